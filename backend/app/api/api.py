@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import sekolah, auth, siswa, dinas, config, common, pendaftaran, upload, user, stats
+from app.api import sekolah, auth, siswa, dinas, config, common, pendaftaran, upload, user, stats, seleksi, search
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -12,3 +12,5 @@ api_router.include_router(pendaftaran.router, prefix="/pendaftaran", tags=["pend
 api_router.include_router(upload.router, prefix="/upload", tags=["upload"])
 api_router.include_router(user.router, prefix="/users", tags=["users"])
 api_router.include_router(stats.router, prefix="/stats", tags=["stats"])
+api_router.include_router(seleksi.router, prefix="/seleksi", tags=["seleksi"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
@@ -1,47 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from typing import List
 from app.api import deps
-from app.crud import common as crud_common
-from app.schemas import registration as schema_reg # Reuse or create new schemas
-
-# Since I don't have schemas for Pengumuman/Berita yet, I'll define them here or usually in schemas/
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
-
-class PengumumanBase(BaseModel):
-    judul: str
-    isi: str
-    tipe: str
-    is_published: bool = True
-
-class Pengumuman(PengumumanBase):
-    id: str
-    published_at: datetime
-    class Config:
-        from_attributes = True
-
-class BeritaBase(BaseModel):
-    judul: str
-    slug: str
-    ringkasan: Optional[str] = None
-    isi: str
-    gambar: Optional[str] = None
-    is_published: bool = True
-
-class Berita(BeritaBase):
-    id: str
-    published_at: datetime
-    class Config:
-        from_attributes = True
+from app.core.config import settings
+from app.core.http_cache import cached_json_response
+from app.services import feeds
+from app.services.hasil import hasil_store
+from app.schemas import common as schema_common
 
 router = APIRouter()
 
-@router.get("/pengumuman", response_model=List[Pengumuman])
-def read_pengumuman_list(db: Session = Depends(deps.get_db)):
-    return crud_common.get_pengumuman_list(db)
-
-@router.get("/berita", response_model=List[Berita])
-def read_berita_list(db: Session = Depends(deps.get_db)):
-    return crud_common.get_berita_list(db)
+def _feed_response(request: Request, page: feeds.Page) -> Response:
+    return cached_json_response(
+        request, page.body, page.etag, f"public, max-age={settings.FEED_MAX_AGE_SECONDS}, must-revalidate",
+        last_modified=page.last_modified,
+    )
+
+@router.get("/pengumuman", response_model=List[schema_common.Pengumuman])
+async def read_pengumuman_list(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    session_factory: async_sessionmaker = Depends(deps.get_public_read_session_factory_async),
+):
+    """
+    Published pengumuman, newest first, served from the feed cache.
+    """
+    return _feed_response(request, await feeds.get_page_async(session_factory, feeds.PENGUMUMAN, skip, limit))
+
+@router.get("/berita", response_model=List[schema_common.Berita])
+async def read_berita_list(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    session_factory: async_sessionmaker = Depends(deps.get_public_read_session_factory_async),
+):
+    """
+    Published berita, newest first, served from the feed cache.
+    """
+    return _feed_response(request, await feeds.get_page_async(session_factory, feeds.BERITA, skip, limit))
+
+@router.get("/hasil/{no_pendaftaran}")
+def read_hasil_seleksi(no_pendaftaran: str):
+    """
+    Public result lookup, served from the published snapshot without a database session.
+    """
+    document = hasil_store.get(no_pendaftaran)
+    if document is None:
+        if not hasil_store.is_published:
+            raise HTTPException(status_code=404, detail="Hasil seleksi belum diumumkan")
+        raise HTTPException(status_code=404, detail="Nomor pendaftaran tidak ditemukan")
+    return Response(content=document, media_type="application/json")
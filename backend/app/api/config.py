@@ -1,27 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Any
 from app.api import deps
-from app.models.jalur import Jalur
+from app.core.config import settings
+from app.core.http_cache import cached_json_response
 from app.models.tahun_ajaran import TahunAjaran
 from app.schemas import registration as schema_reg
+from app.services import reference
 
 router = APIRouter()
 
+# Served from the reference cache: no session unless it has to reload, and
+# a 304 for a client that already has the current version.
+
+def _cache_control() -> str:
+    return f"public, max-age={settings.REFERENCE_MAX_AGE_SECONDS}, must-revalidate"
+
 @router.get("/jalur", response_model=List[schema_reg.Jalur])
-def read_jalur_list(db: Session = Depends(deps.get_db)):
-    return db.query(Jalur).filter(Jalur.is_active == True).order_by(Jalur.order).all()
+async def read_jalur_list(request: Request):
+    doc = await reference.get_async(reference.JALUR)
+    return cached_json_response(request, doc.body, doc.etag, _cache_control())
 
 @router.get("/tahun-ajaran", response_model=List[schema_reg.TahunAjaran])
-def read_tahun_ajaran_list(db: Session = Depends(deps.get_db)):
-    return db.query(TahunAjaran).all()
+async def read_tahun_ajaran_list(request: Request):
+    doc = await reference.get_async(reference.TAHUN_AJARAN)
+    return cached_json_response(request, doc.body, doc.etag, _cache_control())
 
 @router.get("/tahun-ajaran/active", response_model=schema_reg.TahunAjaran)
-def read_active_tahun_ajaran(db: Session = Depends(deps.get_db)):
-    active = db.query(TahunAjaran).filter(TahunAjaran.is_active == True).first()
-    if not active:
+async def read_active_tahun_ajaran(request: Request):
+    doc = await reference.get_async(reference.TAHUN_AJARAN_ACTIVE)
+    if doc.body is None:
         raise HTTPException(status_code=404, detail="No active academic year found")
-    return active
+    return cached_json_response(request, doc.body, doc.etag, _cache_control())
 
 @router.put("/tahun-ajaran/{id}", response_model=schema_reg.TahunAjaran)
 def update_tahun_ajaran(
@@ -44,4 +54,5 @@ def update_tahun_ajaran(
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    reference.invalidate()
     return db_obj
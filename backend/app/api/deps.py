@@ -1,20 +1,43 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, AsyncGenerator, Generator, List, Optional, Tuple, Type
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
+from app.core.cache import MISSING, TTLCache
 from app.core.config import settings
+from app.crud.pagination import Cursor, decode_cursor, encode_cursor
 from app.core.security import ALGORITHM
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, AsyncSessionLocal, ReplicaSessionLocal, AsyncReplicaSessionLocal
 from app.models.user import User
-from app.schemas.user import UserInDB
+from app.schemas import projection
+from app.schemas.user import UserInDB, Principal
+from app.services import identity
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"/api/auth/login"
 )
 
+# Clients can force reads from the primary, e.g. when their next request
+# may land on another worker right after a write.
+PRIMARY_READ_HEADER = "X-Read-Primary"
+
+# Users that wrote recently, their reads go to the primary until the
+# replica has caught up.
+recent_writers = TTLCache(
+    "recent_writers", maxsize=settings.IDENTITY_CACHE_MAX_SIZE, ttl=settings.READ_YOUR_WRITES_SECONDS
+)
+
+def mark_recent_write(user_id: str) -> None:
+    recent_writers.set(user_id, True)
+
+def _read_from_primary(request: Request, user_id: Optional[str] = None) -> bool:
+    if request.headers.get(PRIMARY_READ_HEADER):
+        return True
+    return user_id is not None and recent_writers.get(user_id) is not MISSING
+
 def get_db() -> Generator:
     try:
         db = SessionLocal()
@@ -22,15 +45,24 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_public_read_session_factory_async(request: Request) -> async_sessionmaker:
+    """
+    Session factory for anonymous read-only endpoints, on the replica if
+    configured. The endpoint opens a session only when it needs one (on a
+    cache miss).
+    """
+    return AsyncSessionLocal if _read_from_primary(request) else AsyncReplicaSessionLocal
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(
             token, settings.JWT_SECRET, algorithms=[ALGORITHM]
         )
-        token_data = payload.get("sub")
-        if token_data is None:
+        if payload.get("sub") is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Could not validate credentials",
@@ -40,11 +72,102 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = db.query(User).filter(User.id == token_data).first()
+    return payload
+
+def _revoked_token():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked, please log in again",
+    )
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> User:
+    payload = _decode_token(token)
+    user = identity.get_user(db, user_id=payload["sub"])
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if "ver" in payload and payload["ver"] != user.token_version:
+        raise _revoked_token()
     return user
 
+def _has_scope_claims(payload: dict) -> bool:
+    return "role" in payload and "ver" in payload
+
+def _principal_from_user(user: Optional[User]) -> Principal:
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return Principal(id=user.id, role=user.role, dinas_id=user.dinas_id, sekolah_id=user.sekolah_id)
+
+def _principal_from_claims(payload: dict, state: Optional[tuple]) -> Principal:
+    if state is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    token_version, is_active = state
+    if payload["ver"] != token_version:
+        raise _revoked_token()
+    if not is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return Principal(
+        id=payload["sub"],
+        role=payload["role"],
+        dinas_id=payload.get("dinas_id"),
+        sekolah_id=payload.get("sekolah_id"),
+    )
+
+def get_current_principal(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    Caller identity and scope for role filtering. Tokens issued with scope
+    claims are served from the token plus a cached token_version check;
+    older tokens fall back to the (cached) user lookup. Inactive users are
+    rejected either way.
+    """
+    payload = _decode_token(token)
+    if not _has_scope_claims(payload):
+        return _principal_from_user(identity.get_user(db, user_id=payload["sub"]))
+    return _principal_from_claims(payload, identity.get_token_state(db, user_id=payload["sub"]))
+
+async def get_current_principal_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    get_current_principal for async endpoints.
+    """
+    payload = _decode_token(token)
+    if not _has_scope_claims(payload):
+        return _principal_from_user(await identity.get_user_async(db, user_id=payload["sub"]))
+    return _principal_from_claims(payload, await identity.get_token_state_async(db, user_id=payload["sub"]))
+
+def get_read_db(request: Request, current_user: Principal = Depends(get_current_principal)) -> Generator:
+    """
+    Session for read-only endpoints: the replica if configured, the primary
+    for a user who wrote within READ_YOUR_WRITES_SECONDS.
+    """
+    db = SessionLocal() if _read_from_primary(request, current_user.id) else ReplicaSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_read_db_async(
+    request: Request, current_user: Principal = Depends(get_current_principal_async)
+) -> AsyncGenerator[AsyncSession, None]:
+    factory = AsyncSessionLocal if _read_from_primary(request, current_user.id) else AsyncReplicaSessionLocal
+    async with factory() as db:
+        yield db
+
+async def get_read_session_factory_async(
+    request: Request, current_user: Principal = Depends(get_current_principal_async)
+) -> async_sessionmaker:
+    """
+    Session factory get_read_db_async would use, for streaming responses
+    that must open their session while the body is being sent.
+    """
+    return AsyncSessionLocal if _read_from_primary(request, current_user.id) else AsyncReplicaSessionLocal
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -62,3 +185,48 @@ def get_current_active_super_admin(
             detail="The user doesn't have enough privileges",
         )
     return current_user
+
+# Response header carrying the cursor of the next page of a list endpoint.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def get_cursor(cursor: Optional[str] = None) -> Optional[Cursor]:
+    """
+    `cursor` query parameter of list endpoints, from a previous X-Next-Cursor.
+    """
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def set_next_cursor(response: Response, items: List, limit: int) -> None:
+    # A full page may have a successor; the last page comes back short or empty.
+    if items and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(items[-1])
+
+def get_fields(schema: Type[BaseModel]):
+    """
+    Dependency for the `fields=a,b,c` query parameter of a list endpoint
+    returning `schema` items: the requested fields, or None for all.
+    """
+    def dependency(fields: Optional[str] = None) -> Optional[Tuple[str, ...]]:
+        try:
+            return projection.parse_fields(schema, fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {e}")
+    return dependency
+
+def project(response: Response, schema: Type[BaseModel], fields: Optional[Tuple[str, ...]], items: List) -> Any:
+    """
+    `items` as the endpoint's return value: unchanged without a projection,
+    else already serialized with only `fields` (skipping the response_model,
+    which would require every field).
+    """
+    if not fields:
+        return items
+    return Response(
+        content=projection.dump_json(schema, fields, items),
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
@@ -60,10 +60,7 @@ def delete_dinas(
     """
     Delete a Dinas.
     """
-    db_dinas = crud_dinas.get_dinas(db, dinas_id=dinas_id)
+    db_dinas = crud_dinas.delete_dinas(db, dinas_id=dinas_id)
     if not db_dinas:
         raise HTTPException(status_code=404, detail="Dinas not found")
-    
-    db.delete(db_dinas)
-    db.commit()
     return db_dinas
@@ -1,41 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 from app.api import deps
 from app.crud import pendaftaran as crud_pendaftaran
+from app.crud.pagination import Cursor
 from app.schemas import registration as schema_reg
 from app.models.user import User
+from app.schemas.user import Principal
+from app.services.ranking import ranking_registry
+from app.services import export, identity
 
 router = APIRouter()
 
+def _list_scope(current_user: Principal) -> dict:
+    # Super Admin sees everything (no filter)
+    if current_user.role == "admin_dinas":
+        return {"dinas_id": current_user.dinas_id}
+    if current_user.role == "admin_sekolah":
+        return {"sekolah_id": current_user.sekolah_id}
+    if current_user.role == "siswa":
+        # Siswa should only see their own pendaftaran
+        return {"siswa_user_id": current_user.id}
+    return {}
+
 @router.get("/", response_model=List[schema_reg.Pendaftaran])
-def read_pendaftaran_list(
-    db: Session = Depends(deps.get_db),
+async def read_pendaftaran_list(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db_async),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    after: Optional[Cursor] = Depends(deps.get_cursor),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_fields(schema_reg.Pendaftaran)),
+    filters: schema_reg.PendaftaranFilter = Depends(),
+    current_user: Principal = Depends(deps.get_current_principal_async),
 ):
     """
-    Get pendaftaran list filtered by user role.
+    Get pendaftaran list filtered by user role, and optionally by status,
+    jalur_id, sekolah_id and created_from/created_to. Pages continue with the
+    X-Next-Cursor header passed back as `cursor`. `fields=no_pendaftaran,status`
+    returns only those fields (and id).
     """
-    dinas_id = None
-    sekolah_id = None
-    
-    if current_user.role == "admin_dinas":
-        dinas_id = current_user.dinas_id
-    elif current_user.role == "admin_sekolah":
-        sekolah_id = current_user.sekolah_id
-    elif current_user.role == "siswa":
-        # Siswa should only see their own pendaftaran
-        from app.crud import siswa as crud_siswa
-        db_siswa = crud_siswa.get_siswa_by_user_id(db, user_id=current_user.id)
-        if not db_siswa:
-            return []
-        return db.query(Pendaftaran).filter(Pendaftaran.siswa_id == db_siswa.id).offset(skip).limit(limit).all()
-    
-    # Super Admin sees everything (dinas_id=None, sekolah_id=None)
-    return crud_pendaftaran.get_pendaftaran_list(
-        db, skip=skip, limit=limit, dinas_id=dinas_id, sekolah_id=sekolah_id
+    items = await crud_pendaftaran.get_pendaftaran_list_async(
+        db, skip=skip, limit=limit, after=after, fields=fields, filters=filters, **_list_scope(current_user)
+    )
+    deps.set_next_cursor(response, items, limit)
+    return deps.project(response, schema_reg.Pendaftaran, fields, items)
+
+@router.get("/facets", response_model=schema_reg.PendaftaranFacets)
+async def read_pendaftaran_facets(
+    db: AsyncSession = Depends(deps.get_read_db_async),
+    filters: schema_reg.PendaftaranFilter = Depends(),
+    current_user: Principal = Depends(deps.get_current_principal_async),
+):
+    """
+    Counts per status, jalur and sekolah for the list with the same filters.
+    """
+    return await crud_pendaftaran.get_pendaftaran_facets_async(db, filters=filters, **_list_scope(current_user))
+
+@router.get("/export")
+async def export_pendaftaran(
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    filters: schema_reg.PendaftaranFilter = Depends(),
+    session_factory: async_sessionmaker = Depends(deps.get_read_session_factory_async),
+    current_user: Principal = Depends(deps.get_current_principal_async),
+):
+    """
+    All pendaftaran visible to the caller (same scoping and filters as the
+    list) with siswa, sekolah and jalur columns, as a CSV or XLSX download
+    streamed from a server-side cursor.
+    """
+    writer = export.WRITERS[format]
+    filename = f"pendaftaran-{date.today():%Y%m%d}.{writer.extension}"
+    return StreamingResponse(
+        export.stream_export(session_factory, export.export_query(filters=filters, **_list_scope(current_user)), format),
+        media_type=writer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 @router.post("/", response_model=schema_reg.Pendaftaran)
@@ -49,25 +91,83 @@ def create_pendaftaran(
     Create a new pendaftaran.
     """
     # Find siswa_id for current user
-    from app.crud import siswa as crud_siswa
-    db_siswa = crud_siswa.get_siswa_by_user_id(db, user_id=current_user.id)
+    db_siswa = identity.get_siswa_by_user_id(db, user_id=current_user.id)
     if not db_siswa:
         raise HTTPException(status_code=404, detail="Siswa profile not found")
     
-    return crud_pendaftaran.create_pendaftaran(
+    db_pendaftaran = crud_pendaftaran.create_pendaftaran(
         db=db, pendaftaran=pendaftaran_in, siswa_id=db_siswa.id
     )
+    if not db_pendaftaran:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Kuota sudah penuh")
+    deps.mark_recent_write(current_user.id)
+    return db_pendaftaran
 
 @router.get("/{pendaftaran_id}", response_model=schema_reg.Pendaftaran)
-def read_pendaftaran(
+async def read_pendaftaran(
     pendaftaran_id: str,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(deps.get_read_db_async),
+    current_user: Principal = Depends(deps.get_current_principal_async),
 ):
     """
     Get pendaftaran by ID.
     """
+    db_pendaftaran = await crud_pendaftaran.get_pendaftaran_async(db, pendaftaran_id=pendaftaran_id)
+    if not db_pendaftaran:
+        raise HTTPException(status_code=404, detail="Pendaftaran not found")
+    return db_pendaftaran
+
+@router.get("/{pendaftaran_id}/ranking", response_model=schema_reg.PendaftaranRanking)
+def read_pendaftaran_ranking(
+    pendaftaran_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+):
+    """
+    Current position of a pendaftaran in its school and jalur ranking.
+    """
     db_pendaftaran = crud_pendaftaran.get_pendaftaran(db, pendaftaran_id=pendaftaran_id)
     if not db_pendaftaran:
         raise HTTPException(status_code=404, detail="Pendaftaran not found")
+    if current_user.role == "siswa":
+        db_siswa = identity.get_siswa_by_user_id(db, user_id=current_user.id)
+        if not db_siswa or db_siswa.id != db_pendaftaran.siswa_id:
+            raise HTTPException(status_code=404, detail="Pendaftaran not found")
+
+    position = ranking_registry.position(db, db_pendaftaran)
+    if position is None:
+        raise HTTPException(status_code=400, detail="Pendaftaran is not part of the ranking")
+    return schema_reg.PendaftaranRanking(
+        pendaftaran_id=db_pendaftaran.id,
+        sekolah_id=db_pendaftaran.sekolah_id,
+        jalur_id=db_pendaftaran.jalur_id,
+        **position,
+    )
+
+@router.put("/{pendaftaran_id}", response_model=schema_reg.Pendaftaran)
+def update_pendaftaran(
+    pendaftaran_id: str,
+    pendaftaran_in: schema_reg.PendaftaranUpdate,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+):
+    """
+    Update pendaftaran status (verification by admins).
+    """
+    if current_user.role == "siswa":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges")
+    db_pendaftaran = crud_pendaftaran.get_pendaftaran(db, pendaftaran_id=pendaftaran_id)
+    if not db_pendaftaran:
+        raise HTTPException(status_code=404, detail="Pendaftaran not found")
+    if current_user.role == "admin_sekolah" and db_pendaftaran.sekolah_id != current_user.sekolah_id:
+        raise HTTPException(status_code=404, detail="Pendaftaran not found")
+    if current_user.role == "admin_dinas" and db_pendaftaran.sekolah.dinas_id != current_user.dinas_id:
+        raise HTTPException(status_code=404, detail="Pendaftaran not found")
+
+    db_pendaftaran = crud_pendaftaran.update_pendaftaran(
+        db, db_pendaftaran=db_pendaftaran, pendaftaran_in=pendaftaran_in, verified_by=current_user.id
+    )
+    if not db_pendaftaran:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Kuota sudah penuh")
+    deps.mark_recent_write(current_user.id)
     return db_pendaftaran
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.schemas.search import SearchResult
+from app.schemas.user import Principal
+from app.services import search as search_service
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResult)
+def search(
+    q: str = Query(..., max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(deps.get_read_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+):
+    """
+    Siswa by name, NISN or NIK and sekolah by name or NPSN, scoped like the
+    lists: admin_dinas sees its dinas, admin_sekolah its sekolah and the
+    siswa registered there; siswa only search sekolah.
+    """
+    scope = {}
+    if current_user.role == "admin_dinas":
+        scope["dinas_id"] = current_user.dinas_id
+    elif current_user.role == "admin_sekolah":
+        scope["sekolah_id"] = current_user.sekolah_id
+    include_siswa = current_user.role in ("super_admin", "admin_dinas", "admin_sekolah")
+    return search_service.search(db, q, limit=limit, include_siswa=include_siswa, **scope)
@@ -1,31 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List, Any
+from typing import List, Any, Optional, Tuple
 from app.api import deps
 from app.crud import sekolah as crud_sekolah
+from app.crud.pagination import Cursor
+from app.models.jalur import Jalur
 from app.schemas import sekolah as schema_sekolah
+from app.schemas.user import Principal
+from app.services import identity, zonasi
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schema_sekolah.Sekolah])
 def read_sekolah_list(
-    db: Session = Depends(deps.get_db),
+    response: Response,
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: Any = Depends(deps.get_current_active_user),
+    after: Optional[Cursor] = Depends(deps.get_cursor),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_fields(schema_sekolah.Sekolah)),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
-    Retrieve Schools.
+    Retrieve Schools. Pass the X-Next-Cursor header of a page as `cursor`
+    to get the next one; `skip` is only used without a cursor. `fields=nama,npsn`
+    returns only those fields (and id).
     """
     dinas_id = None
     if current_user.role == "admin_dinas":
         dinas_id = current_user.dinas_id
     elif current_user.role == "admin_sekolah":
         # If admin sekolah, they can only see their own school (handled in get_multi or here)
-        return [crud_sekolah.get_sekolah(db, current_user.sekolah_id)] if current_user.sekolah_id else []
+        items = [crud_sekolah.get_sekolah(db, current_user.sekolah_id)] if current_user.sekolah_id else []
+        return deps.project(response, schema_sekolah.Sekolah, fields, items)
     
     # Super admins see all (dinas_id=None)
-    return crud_sekolah.get_sekolah_list(db, skip=skip, limit=limit, dinas_id=dinas_id)
+    items = crud_sekolah.get_sekolah_list(db, skip=skip, limit=limit, dinas_id=dinas_id, after=after, fields=fields)
+    deps.set_next_cursor(response, items, limit)
+    return deps.project(response, schema_sekolah.Sekolah, fields, items)
 
 @router.post("/", response_model=schema_sekolah.Sekolah)
 def create_sekolah(
@@ -38,6 +50,38 @@ def create_sekolah(
     """
     return crud_sekolah.create_sekolah(db=db, sekolah=sekolah_in)
 
+@router.get("/zonasi", response_model=List[schema_sekolah.SekolahZonasi])
+def read_sekolah_zonasi(
+    jalur_id: Optional[str] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_principal),
+):
+    """
+    Schools within the zonasi radius (km) of the logged in siswa, nearest
+    first, with their distance in km. Uses the given jalur or the active
+    zonasi jalur.
+    """
+    db_siswa = identity.get_siswa_by_user_id(db, user_id=current_user.id)
+    if not db_siswa:
+        raise HTTPException(status_code=404, detail="Siswa profile not found")
+    koordinat = zonasi.parse_koordinat(db_siswa.koordinat_rumah)
+    if not koordinat:
+        raise HTTPException(status_code=400, detail="Koordinat rumah siswa belum diisi")
+
+    query = db.query(Jalur)
+    if jalur_id:
+        db_jalur = query.filter(Jalur.id == jalur_id).first()
+    else:
+        db_jalur = query.filter(Jalur.type == "zonasi", Jalur.is_active == True).order_by(Jalur.order).first()
+    if not db_jalur or not db_jalur.radius_zonasi:
+        raise HTTPException(status_code=404, detail="Jalur zonasi not found")
+
+    lat, lng = koordinat
+    # Jalur.radius_zonasi and the returned jarak are in km, like
+    # Pendaftaran.jarak_ke_sekolah; the index works in meters.
+    rows = zonasi.find_sekolah_within_radius(db, lat=lat, lng=lng, radius_m=db_jalur.radius_zonasi * 1000)
+    return [{**row, "jarak": row["jarak"] / 1000} for row in rows]
+
 @router.get("/{sekolah_id}", response_model=schema_sekolah.Sekolah)
 def read_sekolah(
     sekolah_id: str,
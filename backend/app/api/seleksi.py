@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Any
+from app.api import deps
+from app.services import seleksi as seleksi_service
+from app.services import alokasi as alokasi_service
+from app.services import hasil as hasil_service
+from app.services.ranking import ranking_registry
+from app.schemas import registration as schema_reg
+
+router = APIRouter()
+
+@router.post("/{tahun_ajaran_id}", response_model=schema_reg.SeleksiResult)
+def run_seleksi(
+    tahun_ajaran_id: str,
+    dry_run: bool = False,
+    db: Session = Depends(deps.get_db),
+    current_user: Any = Depends(deps.get_current_active_super_admin),
+):
+    """
+    Run the selection for a whole academic year.
+    Use `dry_run=true` to preview the result without updating any status.
+    """
+    result = seleksi_service.run_seleksi(db, tahun_ajaran_id=tahun_ajaran_id, dry_run=dry_run)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Tahun Ajaran not found")
+    if not dry_run:
+        # Statuses were rewritten in bulk, reload live rankings from the database
+        ranking_registry.reset()
+    return result
+
+@router.post("/{tahun_ajaran_id}/alokasi", response_model=schema_reg.SeleksiResult)
+def run_alokasi(
+    tahun_ajaran_id: str,
+    dry_run: bool = False,
+    db: Session = Depends(deps.get_db),
+    current_user: Any = Depends(deps.get_current_active_super_admin),
+):
+    """
+    Place every siswa in at most one of their chosen schools (deferred acceptance).
+    Use `dry_run=true` to preview the result without updating any status.
+    """
+    result = alokasi_service.run_alokasi(db, tahun_ajaran_id=tahun_ajaran_id, dry_run=dry_run)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Tahun Ajaran not found")
+    if not dry_run:
+        ranking_registry.reset()
+    return result
+
+@router.post("/{tahun_ajaran_id}/publish")
+def publish_hasil(
+    tahun_ajaran_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: Any = Depends(deps.get_current_active_super_admin),
+):
+    """
+    Snapshot the final results for the public lookup on pengumuman day.
+    """
+    count = hasil_service.publish(db, tahun_ajaran_id=tahun_ajaran_id)
+    if count is None:
+        raise HTTPException(status_code=404, detail="Tahun Ajaran not found")
+    return {"tahun_ajaran_id": tahun_ajaran_id, "total": count}
@@ -1,22 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 from app.api import deps
 from app.crud import siswa as crud_siswa
+from app.crud.pagination import Cursor
 from app.schemas import siswa as schema_siswa
 from app.models.user import User
+from app.schemas.user import Principal
+from app.services import identity
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schema_siswa.Siswa])
 def read_siswa_list(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    after: Optional[Cursor] = Depends(deps.get_cursor),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_fields(schema_siswa.Siswa)),
+    current_user: Principal = Depends(deps.get_current_principal),
 ):
     """
-    Retrieve siswa list filtered by user role.
+    Retrieve siswa list filtered by user role. Pages continue with the
+    X-Next-Cursor header passed back as `cursor`. `fields=nama_lengkap,nisn`
+    returns only those fields (and id).
     """
     dinas_id = None
     sekolah_id = None
@@ -27,12 +35,15 @@ def read_siswa_list(
         sekolah_id = current_user.sekolah_id
     elif current_user.role == "siswa":
         # Siswa should only see themselves (handled by /me, but for safety)
-        return [crud_siswa.get_siswa_by_user_id(db, user_id=current_user.id)] if current_user.id else []
+        items = [identity.get_siswa_by_user_id(db, user_id=current_user.id)] if current_user.id else []
+        return deps.project(response, schema_siswa.Siswa, fields, items)
         
     # Super Admin sees everything (dinas_id=None, sekolah_id=None)
-    return crud_siswa.get_siswa_list(
-        db, skip=skip, limit=limit, dinas_id=dinas_id, sekolah_id=sekolah_id
+    items = crud_siswa.get_siswa_list(
+        db, skip=skip, limit=limit, dinas_id=dinas_id, sekolah_id=sekolah_id, after=after, fields=fields
     )
+    deps.set_next_cursor(response, items, limit)
+    return deps.project(response, schema_siswa.Siswa, fields, items)
 
 @router.get("/me", response_model=schema_siswa.Siswa)
 def read_siswa_me(
@@ -42,7 +53,7 @@ def read_siswa_me(
     """
     Get current logged in siswa profile.
     """
-    db_siswa = crud_siswa.get_siswa_by_user_id(db, user_id=current_user.id)
+    db_siswa = identity.get_siswa_by_user_id(db, user_id=current_user.id)
     if not db_siswa:
         raise HTTPException(status_code=404, detail="Siswa profile not found")
     return db_siswa
@@ -1,73 +1,173 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Any
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Optional
 from app.api import deps
-from app.models.user import User, UserRole
-from app.models.dinas import Dinas
-from app.models.sekolah import Sekolah
-from app.models.siswa import Siswa
-from app.models.pendaftaran import Pendaftaran
+from app.core.cache import TTLCache, cache_stats
+from app.core.config import settings
+from app.crud import kuota as crud_kuota
+from app.db.pool import pool_stats
+from app.models.user import UserRole
+from app.schemas.stats import KuotaFill, KuotaFillJalur, KuotaFillSekolah, Timeseries, TimeseriesPoint, TimeseriesSeries
+from app.schemas.user import Principal
+from app.services import rollup
+from app.services.stats import stats_counters
 
 router = APIRouter()
 
+# Serialized /kuota responses.
+kuota_fill_cache = TTLCache(
+    "kuota_fill", maxsize=settings.KUOTA_FILL_CACHE_MAX_SIZE, ttl=settings.KUOTA_FILL_CACHE_TTL_SECONDS
+)
+
+def _fill_rate(terisi: int, kuota: int) -> Optional[float]:
+    return round(terisi / kuota, 4) if kuota else None
+
+def _kuota_fill(rows) -> KuotaFill:
+    sekolah = {}
+    for row in rows:
+        item = sekolah.get(row["sekolah_id"])
+        if item is None:
+            item = sekolah[row["sekolah_id"]] = KuotaFillSekolah(
+                sekolah_id=row["sekolah_id"], npsn=row["npsn"], name=row["sekolah"],
+                kuota=0, terisi=0, pending=0, applicants=0, jalur=[],
+            )
+        jalur = KuotaFillJalur(
+            jalur_id=row["jalur_id"], jalur=row["jalur"], kuota=row["kuota"], terisi=row["terisi"],
+            pending=row["pending"], applicants=row["applicants"], fill_rate=_fill_rate(row["terisi"], row["kuota"]),
+        )
+        item.jalur.append(jalur)
+        for field in ("kuota", "terisi", "pending", "applicants"):
+            setattr(item, field, getattr(item, field) + getattr(jalur, field))
+    for item in sekolah.values():
+        item.fill_rate = _fill_rate(item.terisi, item.kuota)
+    return KuotaFill(sekolah=list(sekolah.values()))
+
+def _naive_utc(at: Optional[datetime]) -> Optional[datetime]:
+    # Buckets hold naive UTC times (the database's now()); aware input is
+    # converted, naive input is taken as UTC already.
+    if at is None or at.tzinfo is None:
+        return at
+    return at.astimezone(timezone.utc).replace(tzinfo=None)
+
 @router.get("/summary")
-def get_stats_summary(
-    db: Session = Depends(deps.get_db),
-    current_user: Any = Depends(deps.get_current_active_user),
+async def get_stats_summary(
+    current_user: Principal = Depends(deps.get_current_principal_async),
 ) -> Any:
     """
-    Get summary statistics based on user role.
+    Get summary statistics based on user role, from the in-process counters.
     """
+    if not stats_counters.ready:
+        await run_in_threadpool(stats_counters.ensure_loaded)
     if current_user.role == UserRole.super_admin:
-        total_users = db.query(func.count(User.id)).scalar()
-        total_dinas = db.query(func.count(Dinas.id)).scalar()
-        total_sekolah = db.query(func.count(Sekolah.id)).scalar()
-        total_siswa = db.query(func.count(Siswa.id)).scalar()
-        
-        super_admins = db.query(func.count(User.id)).filter(User.role == UserRole.super_admin).scalar()
-        admin_dinas = db.query(func.count(User.id)).filter(User.role == UserRole.admin_dinas).scalar()
-        admin_sekolah = db.query(func.count(User.id)).filter(User.role == UserRole.admin_sekolah).scalar()
-        
-        return {
-            "total_users": total_users,
-            "total_dinas": total_dinas,
-            "total_sekolah": total_sekolah,
-            "total_siswa": total_siswa,
-            "roles": {
-                "super_admin": super_admins,
-                "admin_dinas": admin_dinas,
-                "admin_sekolah": admin_sekolah
-            }
-        }
+        return stats_counters.super_admin_summary()
     
     elif current_user.role == UserRole.admin_dinas:
-        dinas_id = current_user.dinas_id
-        if not dinas_id:
+        if not current_user.dinas_id:
             return {"error": "User not linked to any Dinas"}
-            
-        total_sekolah = db.query(func.count(Sekolah.id)).filter(Sekolah.dinas_id == dinas_id).scalar()
-        total_siswa = db.query(func.count(Siswa.id)).join(Pendaftaran, Pendaftaran.siswa_id == Siswa.id).join(Sekolah, Pendaftaran.sekolah_id == Sekolah.id).filter(Sekolah.dinas_id == dinas_id).distinct().scalar()
-        
-        total_pendaftaran = db.query(func.count(Pendaftaran.id)).join(Sekolah, Pendaftaran.sekolah_id == Sekolah.id).filter(Sekolah.dinas_id == dinas_id).scalar()
-        
-        return {
-            "total_sekolah": total_sekolah,
-            "total_siswa": total_siswa,
-            "total_pendaftaran": total_pendaftaran,
-        }
+        return stats_counters.dinas_summary(current_user.dinas_id)
     
     elif current_user.role == UserRole.admin_sekolah:
-        sekolah_id = current_user.sekolah_id
-        if not sekolah_id:
+        if not current_user.sekolah_id:
             return {"error": "User not linked to any Sekolah"}
-            
-        total_siswa = db.query(func.count(Siswa.id)).join(Pendaftaran, Pendaftaran.siswa_id == Siswa.id).filter(Pendaftaran.sekolah_id == sekolah_id).distinct().scalar()
-        total_pendaftaran = db.query(func.count(Pendaftaran.id)).filter(Pendaftaran.sekolah_id == sekolah_id).scalar()
-        
-        return {
-            "total_siswa": total_siswa,
-            "total_pendaftaran": total_pendaftaran,
-        }
+        return stats_counters.sekolah_summary(current_user.sekolah_id)
         
     return {"error": "Unauthorized role for stats"}
+
+@router.get("/timeseries", response_model=Timeseries)
+async def get_stats_timeseries(
+    granularity: str = Query("hour", pattern="^(minute|hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tahun_ajaran_id: Optional[str] = None,
+    sekolah_id: Optional[str] = None,
+    jalur_id: Optional[str] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    group_by: Optional[str] = Query(None, pattern="^(jalur|sekolah|status)$"),
+    db: AsyncSession = Depends(deps.get_read_db_async),
+    current_user: Principal = Depends(deps.get_current_principal_async),
+) -> Any:
+    """
+    Pendaftaran created per minute, hour or day in [start, end) (UTC when
+    no offset is given), by the status they have now, optionally split per jalur, sekolah or status.
+    Served from the rollup buckets; empty buckets are left out. Defaults
+    to the last DEFAULT_BUCKETS buckets, scoped to the caller's dinas or
+    sekolah.
+    """
+    if current_user.role == UserRole.siswa:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges")
+    width = rollup.GRANULARITIES[granularity]
+    end = _naive_utc(end) or datetime.now(timezone.utc).replace(tzinfo=None)
+    start = _naive_utc(start)
+    start = start or end - width * rollup.DEFAULT_BUCKETS
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / width > rollup.MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range spans more than {rollup.MAX_BUCKETS} {granularity} buckets")
+
+    dinas_id = None
+    if current_user.role == UserRole.admin_dinas:
+        dinas_id = current_user.dinas_id or ""
+    elif current_user.role == UserRole.admin_sekolah:
+        # Another sekolah than the caller's matches nothing, as in the lists.
+        if sekolah_id is not None and sekolah_id != current_user.sekolah_id:
+            return Timeseries(granularity=granularity, start=start, end=end, group_by=group_by, series=[])
+        sekolah_id = current_user.sekolah_id or ""
+
+    series = await rollup.timeseries_async(
+        db, granularity, start, end, tahun_ajaran_id=tahun_ajaran_id, dinas_id=dinas_id, sekolah_id=sekolah_id,
+        jalur_id=jalur_id, status=status_filter, group_by=group_by,
+    )
+    return Timeseries(
+        granularity=granularity, start=start, end=end, group_by=group_by,
+        series=[
+            TimeseriesSeries(key=key, points=[TimeseriesPoint(bucket=at, count=count) for at, count in points])
+            for key, points in series.items()
+        ],
+    )
+
+@router.get("/kuota", response_model=KuotaFill)
+async def get_stats_kuota(
+    tahun_ajaran_id: Optional[str] = None,
+    db: AsyncSession = Depends(deps.get_read_db_async),
+    current_user: Principal = Depends(deps.get_current_principal_async),
+) -> Any:
+    """
+    Kuota, seats filled, pending and total applicants per jalur of every
+    sekolah in the caller's scope, for a tahun ajaran (default: the active
+    one). Computed in one grouped query and cached for
+    KUOTA_FILL_CACHE_TTL_SECONDS; concurrent misses share one computation.
+    """
+    scope = {}
+    if current_user.role == UserRole.admin_dinas:
+        scope["dinas_id"] = current_user.dinas_id or ""
+    elif current_user.role == UserRole.admin_sekolah:
+        scope["sekolah_id"] = current_user.sekolah_id or ""
+    elif current_user.role != UserRole.super_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges")
+
+    async def compute() -> bytes:
+        rows = await crud_kuota.get_kuota_fill_async(db, tahun_ajaran_id=tahun_ajaran_id, **scope)
+        return _kuota_fill(rows).model_dump_json().encode()
+
+    key = (tahun_ajaran_id, scope.get("dinas_id"), scope.get("sekolah_id"))
+    return Response(content=await kuota_fill_cache.get_or_compute_async(key, compute), media_type="application/json")
+
+@router.get("/cache")
+def get_cache_stats(
+    current_user: Any = Depends(deps.get_current_active_super_admin),
+) -> Any:
+    """
+    Hit/miss counters of the in-process caches of this worker.
+    """
+    return cache_stats()
+
+@router.get("/pool")
+def get_pool_stats(
+    current_user: Any = Depends(deps.get_current_active_super_admin),
+) -> Any:
+    """
+    Connection pool usage and checkout waits of the engines of this worker.
+    """
+    return pool_stats()
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List, Any
+from typing import List, Any, Optional, Tuple
 from app.api import deps
 from app.crud import user as crud_user
+from app.crud.pagination import Cursor
 from app.schemas.user import UserInDB, UserCreate, UserUpdate
 from app.models.user import UserRole
 
@@ -10,16 +11,21 @@ router = APIRouter()
 
 @router.get("/", response_model=List[UserInDB])
 def read_users(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[Cursor] = Depends(deps.get_cursor),
+    fields: Optional[Tuple[str, ...]] = Depends(deps.get_fields(UserInDB)),
     current_user: Any = Depends(deps.get_current_active_super_admin),
 ) -> Any:
     """
-    Retrieve users.
+    Retrieve users. Pages continue with the X-Next-Cursor header passed
+    back as `cursor`. `fields=email,role` returns only those fields (and id).
     """
-    users = crud_user.get_multi(db, skip=skip, limit=limit)
-    return users
+    users = crud_user.get_multi(db, skip=skip, limit=limit, after=after, fields=fields)
+    deps.set_next_cursor(response, users, limit)
+    return deps.project(response, UserInDB, fields, users)
 
 @router.post("/", response_model=UserInDB)
 def create_user(
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 import json
 
 class Settings(BaseSettings):
@@ -7,9 +7,63 @@ class Settings(BaseSettings):
     APP_NAME: str = "SPMB API"
     API_PORT: int = 8000
     DATABASE_URL: str
+    # Defaults to DATABASE_URL with the matching async driver (aiomysql / aiosqlite)
+    DATABASE_ASYNC_URL: Optional[str] = None
+    # Optional read replica for read-only endpoints (async driver derived the same way)
+    DATABASE_REPLICA_URL: Optional[str] = None
+    # After a write a user reads from the primary for this long (replica lag budget)
+    READ_YOUR_WRITES_SECONDS: int = 10
+    # Connection pool of each engine, per worker process. Pre-ping tests a
+    # connection on checkout (pessimistic); without it stale connections are
+    # only detected when a statement fails and then recycled.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
     JWT_SECRET: str
     JWT_EXPIRE_MINUTES: int = 1440
+    # Embed role, dinas_id, sekolah_id and token version in access tokens
+    JWT_SCOPE_CLAIMS: bool = False
     CORS_ORIGINS: str = '["http://localhost:3000"]'
+    # Take a Kuota seat (terisi + 1) on every new pendaftaran and refuse once full
+    KUOTA_RESERVATION_ENABLED: bool = False
+    # Process pool for bcrypt on login; logins beyond MAX_PENDING get 503
+    PASSWORD_POOL_WORKERS: int = 2
+    PASSWORD_POOL_MAX_PENDING: int = 64
+    # Cached users / siswa profiles resolved from access tokens
+    IDENTITY_CACHE_TTL_SECONDS: int = 60
+    IDENTITY_CACHE_MAX_SIZE: int = 10000
+    # How long a worker trusts its cached token_version of a user
+    TOKEN_VERSION_TTL_SECONDS: int = 30
+    # Requests above either limit are logged with their most repeated statements
+    SLOW_REQUEST_QUERY_COUNT: int = 30
+    SLOW_REQUEST_DB_MS: int = 500
+    # A statement repeated this often in one request is reported as an N+1
+    N_PLUS_ONE_THRESHOLD: int = 10
+    # Facet counts of the pendaftaran list, per role scope and filter
+    FACET_CACHE_TTL_SECONDS: int = 30
+    FACET_CACHE_MAX_SIZE: int = 1024
+    # Kuota fill rates per role scope and tahun ajaran
+    KUOTA_FILL_CACHE_TTL_SECONDS: int = 15
+    KUOTA_FILL_CACHE_MAX_SIZE: int = 1024
+    # Jalur / tahun ajaran responses: kept until written by this worker, or
+    # this long (other workers' writes); browsers revalidate after MAX_AGE
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+    REFERENCE_MAX_AGE_SECONDS: int = 0
+    # Public pengumuman / berita pages: kept until written by this worker, or
+    # this long (rows written elsewhere); browsers and CDNs reuse for MAX_AGE
+    FEED_CACHE_TTL_SECONDS: int = 60
+    FEED_CACHE_MAX_SIZE: int = 256
+    FEED_MAX_AGE_SECONDS: int = 30
+    # Stats summary counters are recounted this often (drift, other workers' writes)
+    STATS_RECONCILE_SECONDS: int = 60
+    # Published seleksi results, memory-mapped by every worker
+    HASIL_SNAPSHOT_PATH: str = "app/data/hasil_seleksi.snap"
+
+    @property
+    def query_stats_headers(self) -> bool:
+        return self.APP_ENV != "production"
 
     @property
     def cors_origins_list(self) -> List[str]:
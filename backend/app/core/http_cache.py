@@ -0,0 +1,54 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+
+def strong_etag(body: bytes) -> str:
+    """
+    Strong ETag derived from the bytes alone, so every worker serving the
+    same content sends the same tag.
+    """
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists `etag` (or is "*"). Weak tags
+    match too: If-None-Match uses the weak comparison.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def _unmodified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+def cached_json_response(
+    request: Request, body: bytes, etag: str, cache_control: str, last_modified: Optional[datetime] = None
+) -> Response:
+    """
+    `body` (JSON) with its ETag, Last-Modified (an aware datetime, whole
+    seconds) and Cache-Control, or an empty 304 when the request's
+    If-None-Match already holds it. If-Modified-Since is only looked at
+    when there is no If-None-Match.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match:
+        not_modified = etag_matches(if_none_match, etag)
+    else:
+        not_modified = bool(if_modified_since and last_modified) and _unmodified_since(if_modified_since, last_modified)
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
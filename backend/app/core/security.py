@@ -1,5 +1,8 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -9,7 +12,7 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 ALGORITHM = "HS256"
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[dict] = None
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -17,12 +20,64 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.JWT_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=ALGORITHM)
     return encoded_jwt
 
+def scope_claims(user: Any) -> dict:
+    """
+    Claims that let endpoints scope queries without loading the user.
+    """
+    role = user.role.value if hasattr(user.role, "value") else user.role
+    return {
+        "role": role,
+        "dinas_id": user.dinas_id,
+        "sekolah_id": user.sekolah_id,
+        "ver": user.token_version or 0,
+    }
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+class PasswordPoolBusy(Exception):
+    """
+    Raised when the password hashing pool already has its maximum of pending jobs.
+    """
+
+_password_pool: Optional[ProcessPoolExecutor] = None
+_password_pool_lock = threading.Lock()
+_password_pool_slots = threading.BoundedSemaphore(settings.PASSWORD_POOL_MAX_PENDING)
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        with _password_pool_lock:
+            if _password_pool is None:
+                _password_pool = ProcessPoolExecutor(max_workers=settings.PASSWORD_POOL_WORKERS)
+    return _password_pool
+
+async def verify_password_offloaded(plain_password: str, hashed_password: str) -> bool:
+    """
+    verify_password in the dedicated process pool, so bcrypt does not hold
+    the event loop, the threadpool or the GIL of this worker.
+    Raises PasswordPoolBusy instead of queueing beyond PASSWORD_POOL_MAX_PENDING.
+    """
+    if not _password_pool_slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    try:
+        future = _get_password_pool().submit(verify_password, plain_password, hashed_password)
+    except BaseException:
+        _password_pool_slots.release()
+        raise
+    future.add_done_callback(lambda _: _password_pool_slots.release())
+    return await asyncio.wrap_future(future)
+
+def shutdown_password_pool() -> None:
+    global _password_pool
+    with _password_pool_lock:
+        if _password_pool is not None:
+            _password_pool.shutdown(wait=False, cancel_futures=True)
+            _password_pool = None
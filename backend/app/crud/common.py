@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.pengumuman import Pengumuman
 from app.models.berita import Berita
@@ -11,3 +13,15 @@ def get_berita_list(db: Session, skip: int = 0, limit: int = 100):
 
 def get_berita_by_slug(db: Session, slug: str):
     return db.query(Berita).filter(Berita.slug == slug).first()
+
+async def get_pengumuman_list_async(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.scalars(
+        select(Pengumuman).where(Pengumuman.is_published == True).order_by(Pengumuman.created_at.desc()).offset(skip).limit(limit)
+    )
+    return result.all()
+
+async def get_berita_list_async(db: AsyncSession, skip: int = 0, limit: int = 100):
+    result = await db.scalars(
+        select(Berita).where(Berita.is_published == True).order_by(Berita.created_at.desc()).offset(skip).limit(limit)
+    )
+    return result.all()
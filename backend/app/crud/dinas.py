@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.dinas import Dinas
 from app.schemas.sekolah import DinasCreate, DinasUpdate
+from app.services.stats import stats_counters
 import uuid
 
 def get_dinas(db: Session, dinas_id: str):
@@ -17,6 +18,7 @@ def create_dinas(db: Session, dinas: DinasCreate):
     db.add(db_dinas)
     db.commit()
     db.refresh(db_dinas)
+    stats_counters.on_dinas_created()
     return db_dinas
 
 def update_dinas(db: Session, dinas_id: str, dinas_in: DinasUpdate):
@@ -32,3 +34,11 @@ def update_dinas(db: Session, dinas_id: str, dinas_in: DinasUpdate):
     db.commit()
     db.refresh(db_dinas)
     return db_dinas
+
+def delete_dinas(db: Session, dinas_id: str):
+    db_dinas = db.query(Dinas).filter(Dinas.id == dinas_id).first()
+    if db_dinas:
+        db.delete(db_dinas)
+        db.commit()
+        stats_counters.on_dinas_deleted()
+    return db_dinas
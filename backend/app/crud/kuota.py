@@ -0,0 +1,114 @@
+from typing import List, Optional
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.crud.scope import scope_pendaftaran, sekolah_of_dinas
+from app.models.jalur import Jalur
+from app.models.kuota import Kuota
+from app.models.pendaftaran import Pendaftaran
+from app.models.sekolah import Sekolah
+from app.models.tahun_ajaran import TahunAjaran
+from app.services.seleksi import ELIGIBLE_STATUSES
+
+# Statuses that may still take a seat: not yet through seleksi.
+PENDING_STATUSES = ("draft", *ELIGIBLE_STATUSES)
+
+# Statuses holding the seat reserved when the pendaftaran was created;
+# leaving them (rejected, tidak_diterima, ...) gives it back.
+RESERVED_STATUSES = (*PENDING_STATUSES, "diterima")
+
+def get_kuota(db: Session, sekolah_id: str, jalur_id: str, tahun_ajaran: str) -> Optional[Kuota]:
+    return db.query(Kuota).filter(
+        Kuota.sekolah_id == sekolah_id,
+        Kuota.jalur_id == jalur_id,
+        Kuota.tahun_ajaran == tahun_ajaran,
+    ).first()
+
+def reserve_seat(db: Session, sekolah_id: str, jalur_id: str, tahun_ajaran: str) -> bool:
+    """
+    Atomically take one seat: `UPDATE kuota SET terisi = terisi + 1 WHERE terisi < kuota`.
+    The check and the increment happen in a single statement, so concurrent
+    callers can never oversell. Does not commit; the row lock is held until
+    the caller's transaction ends, so commit right after.
+    """
+    result = db.execute(
+        update(Kuota)
+        .where(
+            Kuota.sekolah_id == sekolah_id,
+            Kuota.jalur_id == jalur_id,
+            Kuota.tahun_ajaran == tahun_ajaran,
+            Kuota.terisi < Kuota.kuota,
+        )
+        .values(terisi=Kuota.terisi + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+def release_seat(db: Session, sekolah_id: str, jalur_id: str, tahun_ajaran: str) -> bool:
+    """
+    Give back a seat taken with `reserve_seat`. Does not commit.
+    """
+    result = db.execute(
+        update(Kuota)
+        .where(
+            Kuota.sekolah_id == sekolah_id,
+            Kuota.jalur_id == jalur_id,
+            Kuota.tahun_ajaran == tahun_ajaran,
+            Kuota.terisi > 0,
+        )
+        .values(terisi=Kuota.terisi - 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+async def get_kuota_fill_async(db: AsyncSession, tahun_ajaran_id: Optional[str] = None, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None) -> List[dict]:
+    """
+    Every Kuota row of a tahun ajaran (default: the active ones) in scope,
+    with its sekolah and jalur names and the pendaftaran counted against
+    it, in one statement: applicants (all statuses) and pending (not yet
+    through seleksi). Ordered by sekolah name, then jalur order.
+    """
+    counts = (
+        select(
+            Pendaftaran.sekolah_id,
+            Pendaftaran.jalur_id,
+            Pendaftaran.tahun_ajaran_id,
+            func.count(Pendaftaran.id).label("applicants"),
+            func.sum(case((Pendaftaran.status.in_(PENDING_STATUSES), 1), else_=0)).label("pending"),
+        )
+        .group_by(Pendaftaran.sekolah_id, Pendaftaran.jalur_id, Pendaftaran.tahun_ajaran_id)
+    )
+    counts = scope_pendaftaran(counts, dinas_id=dinas_id, sekolah_id=sekolah_id)
+    tahun_ajaran = TahunAjaran.id == tahun_ajaran_id if tahun_ajaran_id else TahunAjaran.is_active.is_(True)
+    counts = counts.where(Pendaftaran.tahun_ajaran_id.in_(select(TahunAjaran.id).where(tahun_ajaran))).subquery()
+
+    query = (
+        select(
+            Sekolah.id.label("sekolah_id"),
+            Sekolah.npsn,
+            Sekolah.name.label("sekolah"),
+            Jalur.id.label("jalur_id"),
+            Jalur.name.label("jalur"),
+            TahunAjaran.id.label("tahun_ajaran_id"),
+            Kuota.kuota,
+            func.coalesce(Kuota.terisi, 0).label("terisi"),
+            func.coalesce(counts.c.pending, 0).label("pending"),
+            func.coalesce(counts.c.applicants, 0).label("applicants"),
+        )
+        .select_from(Kuota)
+        .join(TahunAjaran, TahunAjaran.tahun == Kuota.tahun_ajaran)
+        .join(Sekolah, Kuota.sekolah_id == Sekolah.id)
+        .join(Jalur, Kuota.jalur_id == Jalur.id)
+        .outerjoin(counts, and_(
+            counts.c.sekolah_id == Kuota.sekolah_id,
+            counts.c.jalur_id == Kuota.jalur_id,
+            counts.c.tahun_ajaran_id == TahunAjaran.id,
+        ))
+        .where(tahun_ajaran)
+        .order_by(Sekolah.name, Sekolah.id, Jalur.order, Jalur.id)
+    )
+    if sekolah_id:
+        query = query.where(Kuota.sekolah_id == sekolah_id)
+    elif dinas_id:
+        query = query.where(Kuota.sekolah_id.in_(sekolah_of_dinas(dinas_id)))
+    return [row._asdict() for row in await db.execute(query)]
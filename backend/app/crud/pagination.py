@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import String, literal, or_
+from sqlalchemy.orm import load_only
+
+Cursor = Tuple[datetime, str]
+
+def encode_cursor(row) -> str:
+    """
+    Opaque cursor pointing just after `row`, from its (created_at, id).
+    """
+    raw = json.dumps([row.created_at.isoformat(), row.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Raises ValueError for anything `encode_cursor` did not produce.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def paginate(query, model, skip: int = 0, limit: int = 100, after: Optional[Cursor] = None):
+    """
+    Order `query` by (created_at, id) and take one page: the rows after the
+    `after` cursor when given (keyset, cost independent of depth), else
+    `skip` rows in. Works on legacy Query and select() alike.
+    """
+    query = query.order_by(model.created_at, model.id)
+    if after is not None:
+        created_at, row_id = after
+        # Bound as text, "YYYY-MM-DD HH:MM:SS[.ffffff]". MySQL converts it
+        # to a DATETIME constant; SQLite compares the stored text, where
+        # CURRENT_TIMESTAMP rows have no fractional part and would never
+        # equal the ".000000" a DateTime parameter renders with.
+        anchor = literal(str(created_at), String)
+        # The redundant >= gives the planner a range on the index, an OR
+        # alone makes SQLite (and older MySQL) scan it from the start.
+        query = query.where(
+            model.created_at >= anchor,
+            or_(model.created_at > anchor, model.id > row_id),
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def load_fields(query, model, fields: Optional[Sequence[str]] = None):
+    """
+    Load only `fields` of `model` (plus the pagination keys) when given.
+    """
+    if not fields:
+        return query
+    names = dict.fromkeys((*fields, "id", "created_at"))
+    return query.options(load_only(*(getattr(model, name) for name in names)))
@@ -1,31 +1,161 @@
+from sqlalchemy import String, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.pendaftaran import Pendaftaran
-from app.schemas.registration import PendaftaranCreate
+from app.models.tahun_ajaran import TahunAjaran
+from app.schemas.registration import PendaftaranCreate, PendaftaranFilter, PendaftaranUpdate
+from app.crud import kuota as crud_kuota
+from app.crud.pagination import Cursor, load_fields, paginate
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.services import rollup
+from app.services.ranking import ranking_registry
+from app.services.stats import stats_counters
+from app.services.search import search_index
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 def get_pendaftaran(db: Session, pendaftaran_id: str):
     return db.query(Pendaftaran).filter(Pendaftaran.id == pendaftaran_id).first()
 
-from typing import Optional
+from typing import Optional, Sequence
 from app.models.sekolah import Sekolah
+from app.models.siswa import Siswa
 
-def get_pendaftaran_list(db: Session, skip: int = 0, limit: int = 100, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None):
-    query = db.query(Pendaftaran)
+# Facet name -> grouped column, and the filter field that facet ignores.
+FACETS = {
+    "status": (Pendaftaran.status, "status"),
+    "jalur": (Pendaftaran.jalur_id, "jalur_id"),
+    "sekolah": (Pendaftaran.sekolah_id, "sekolah_id"),
+}
+
+facet_cache = TTLCache(
+    "pendaftaran_facets", maxsize=settings.FACET_CACHE_MAX_SIZE, ttl=settings.FACET_CACHE_TTL_SECONDS
+)
+
+def apply_filters(query, filters: Optional[PendaftaranFilter] = None, exclude: Optional[str] = None):
+    """
+    Narrow a Query or select() over Pendaftaran by `filters`, leaving out
+    the `exclude` field.
+    """
+    if filters is None:
+        return query
+    for field in ("status", "jalur_id", "sekolah_id"):
+        value = getattr(filters, field)
+        if value is not None and field != exclude:
+            query = query.where(getattr(Pendaftaran, field) == value)
+    # Dates bound as text for the same reason as the pagination anchor.
+    if filters.created_from:
+        query = query.where(Pendaftaran.created_at >= literal(str(filters.created_from), String))
+    if filters.created_to:
+        query = query.where(Pendaftaran.created_at < literal(str(filters.created_to + timedelta(days=1)), String))
+    return query
+
+def _scoped(query, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None, siswa_user_id: Optional[str] = None):
+    if siswa_user_id:
+        return query.join(Siswa, Pendaftaran.siswa_id == Siswa.id).where(Siswa.user_id == siswa_user_id)
+    if sekolah_id:
+        return query.where(Pendaftaran.sekolah_id == sekolah_id)
+    if dinas_id:
+        return query.join(Sekolah).where(Sekolah.dinas_id == dinas_id)
+    return query
+
+def get_pendaftaran_list(db: Session, skip: int = 0, limit: int = 100, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None, after: Optional[Cursor] = None, fields: Optional[Sequence[str]] = None, filters: Optional[PendaftaranFilter] = None):
+    query = apply_filters(load_fields(db.query(Pendaftaran), Pendaftaran, fields), filters)
     if sekolah_id:
         query = query.filter(Pendaftaran.sekolah_id == sekolah_id)
     elif dinas_id:
         query = query.join(Sekolah).filter(Sekolah.dinas_id == dinas_id)
-    return query.offset(skip).limit(limit).all()
+    return paginate(query, Pendaftaran, skip=skip, limit=limit, after=after).all()
+
+async def get_pendaftaran_async(db: AsyncSession, pendaftaran_id: str):
+    return await db.scalar(select(Pendaftaran).where(Pendaftaran.id == pendaftaran_id))
+
+async def get_pendaftaran_list_async(db: AsyncSession, skip: int = 0, limit: int = 100, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None, siswa_user_id: Optional[str] = None, after: Optional[Cursor] = None, fields: Optional[Sequence[str]] = None, filters: Optional[PendaftaranFilter] = None):
+    query = load_fields(select(Pendaftaran), Pendaftaran, fields)
+    query = apply_filters(_scoped(query, dinas_id, sekolah_id, siswa_user_id), filters)
+    result = await db.scalars(paginate(query, Pendaftaran, skip=skip, limit=limit, after=after))
+    return result.all()
+
+async def get_pendaftaran_facets_async(db: AsyncSession, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None, siswa_user_id: Optional[str] = None, filters: Optional[PendaftaranFilter] = None) -> dict:
+    """
+    Counts per status, jalur and sekolah of the pendaftaran matching the
+    scope and `filters`, one grouped query per facet. A facet ignores its
+    own filter, so the other values stay selectable. Cached for
+    FACET_CACHE_TTL_SECONDS per scope and filter.
+    """
+    key = (dinas_id, sekolah_id, siswa_user_id, tuple(filters.model_dump().values()) if filters else None)
+    facets = facet_cache.get(key)
+    if facets is not MISSING:
+        return facets
+    facets = {}
+    for name, (column, field) in FACETS.items():
+        query = _scoped(select(column, func.count()).select_from(Pendaftaran), dinas_id, sekolah_id, siswa_user_id)
+        query = apply_filters(query, filters, exclude=field).group_by(column)
+        facets[name] = {value: count for value, count in (await db.execute(query)).all() if value is not None}
+    facet_cache.set(key, facets)
+    return facets
 
 def create_pendaftaran(db: Session, pendaftaran: PendaftaranCreate, siswa_id: str):
+    """
+    Returns None when seat reservation is enabled and the Kuota is full.
+    """
     db_pendaftaran = Pendaftaran(
         id=str(uuid.uuid4()),
         siswa_id=siswa_id,
         no_pendaftaran=f"SPMB-{datetime.now().year}-{str(uuid.uuid4())[:8].upper()}",
         **pendaftaran.model_dump()
     )
+    db.add(db_pendaftaran)
+    # Insert first so the hot Kuota row is locked only between the
+    # reservation and the commit; the rollup needs created_at.
+    db.flush()
+    rollup.on_pendaftaran_created(db, db_pendaftaran)
+    if settings.KUOTA_RESERVATION_ENABLED:
+        tahun = db.query(TahunAjaran.tahun).filter(TahunAjaran.id == pendaftaran.tahun_ajaran_id).scalar()
+        if not crud_kuota.reserve_seat(
+            db, sekolah_id=pendaftaran.sekolah_id, jalur_id=pendaftaran.jalur_id, tahun_ajaran=tahun
+        ):
+            db.rollback()
+            return None
+    db.commit()
+    db.refresh(db_pendaftaran)
+    ranking_registry.on_pendaftaran_saved(db_pendaftaran)
+    search_index.on_pendaftaran_saved(db_pendaftaran)
+    stats_counters.on_pendaftaran_created(db, db_pendaftaran)
+    return db_pendaftaran
+
+def update_pendaftaran(db: Session, db_pendaftaran: Pendaftaran, pendaftaran_in: PendaftaranUpdate, verified_by: Optional[str] = None):
+    """
+    Returns None when seat reservation is enabled and the status change
+    needs a seat back (e.g. rejected -> verified) but the Kuota is full.
+    """
+    update_data = pendaftaran_in.model_dump(exclude_unset=True)
+    old_status = db_pendaftaran.status
+    for field, value in update_data.items():
+        setattr(db_pendaftaran, field, value)
+    if update_data.get("status") == "verified":
+        db_pendaftaran.verified_at = datetime.now()
+        db_pendaftaran.verified_by = verified_by
+    rollup.on_status_changed(db, db_pendaftaran, old_status)
+    if settings.KUOTA_RESERVATION_ENABLED:
+        held = old_status in crud_kuota.RESERVED_STATUSES
+        holds = db_pendaftaran.status in crud_kuota.RESERVED_STATUSES
+        if held != holds:
+            seat = dict(
+                sekolah_id=db_pendaftaran.sekolah_id,
+                jalur_id=db_pendaftaran.jalur_id,
+                tahun_ajaran=db.query(TahunAjaran.tahun).filter(TahunAjaran.id == db_pendaftaran.tahun_ajaran_id).scalar(),
+            )
+            # Same transaction as the status, so the two never disagree.
+            if held:
+                crud_kuota.release_seat(db, **seat)
+            elif not crud_kuota.reserve_seat(db, **seat):
+                db.rollback()
+                return None
+
     db.add(db_pendaftaran)
     db.commit()
     db.refresh(db_pendaftaran)
+    ranking_registry.on_pendaftaran_saved(db_pendaftaran)
     return db_pendaftaran
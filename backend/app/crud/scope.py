@@ -0,0 +1,52 @@
+from typing import Optional
+from sqlalchemy import select
+from app.models.pendaftaran import Pendaftaran
+from app.models.sekolah import Sekolah
+from app.models.siswa import Siswa
+
+# Role scoping as semi-joins. A join from Siswa to its Pendaftaran repeats
+# the siswa once per registration (and needs DISTINCT to count); a semi-join
+# keeps one row per siswa. Written as `siswa.id IN (subquery)` rather than
+# a correlated EXISTS: both are semi-joins to MySQL, but SQLite runs EXISTS
+# as a probe per siswa row while IN lets it start from the pendaftaran
+# indexes of the sekolah.
+
+def sekolah_of_dinas(dinas_id: str):
+    return select(Sekolah.id).where(Sekolah.dinas_id == dinas_id)
+
+def pendaftaran_criterion(dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None):
+    """
+    Pendaftaran at the sekolah, or at any sekolah of the dinas; None when unscoped.
+    """
+    if sekolah_id:
+        return Pendaftaran.sekolah_id == sekolah_id
+    if dinas_id:
+        return Pendaftaran.sekolah_id.in_(sekolah_of_dinas(dinas_id))
+    return None
+
+def siswa_criterion(dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None):
+    """
+    Siswa with at least one pendaftaran at the sekolah, or at any sekolah of
+    the dinas; None when unscoped.
+    """
+    if sekolah_id:
+        registered = select(Pendaftaran.siswa_id).where(Pendaftaran.sekolah_id == sekolah_id)
+    elif dinas_id:
+        # Inside the semi-join a join fans out nothing, and lets the planner
+        # start from ix_sekolah_dinas_id.
+        registered = (
+            select(Pendaftaran.siswa_id)
+            .join(Sekolah, Pendaftaran.sekolah_id == Sekolah.id)
+            .where(Sekolah.dinas_id == dinas_id)
+        )
+    else:
+        return None
+    return Siswa.id.in_(registered)
+
+def scope_siswa(query, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None):
+    criterion = siswa_criterion(dinas_id, sekolah_id)
+    return query if criterion is None else query.where(criterion)
+
+def scope_pendaftaran(query, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None):
+    criterion = pendaftaran_criterion(dinas_id, sekolah_id)
+    return query if criterion is None else query.where(criterion)
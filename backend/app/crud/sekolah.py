@@ -1,17 +1,21 @@
-from typing import Optional
+from typing import Optional, Sequence
 from sqlalchemy.orm import Session
 from app.models.sekolah import Sekolah
+from app.crud.pagination import Cursor, load_fields, paginate
 from app.schemas import sekolah as schema_sekolah
+from app.services.search import search_index
+from app.services.stats import stats_counters
+from app.services.zonasi import sekolah_index
 import uuid
 
 def get_sekolah(db: Session, sekolah_id: str):
     return db.query(Sekolah).filter(Sekolah.id == sekolah_id).first()
 
-def get_sekolah_list(db: Session, skip: int = 0, limit: int = 100, dinas_id: Optional[str] = None):
-    query = db.query(Sekolah)
+def get_sekolah_list(db: Session, skip: int = 0, limit: int = 100, dinas_id: Optional[str] = None, after: Optional[Cursor] = None, fields: Optional[Sequence[str]] = None):
+    query = load_fields(db.query(Sekolah), Sekolah, fields)
     if dinas_id:
         query = query.filter(Sekolah.dinas_id == dinas_id)
-    return query.offset(skip).limit(limit).all()
+    return paginate(query, Sekolah, skip=skip, limit=limit, after=after).all()
 
 def create_sekolah(db: Session, sekolah: schema_sekolah.SekolahCreate):
     db_sekolah = Sekolah(
@@ -21,6 +25,9 @@ def create_sekolah(db: Session, sekolah: schema_sekolah.SekolahCreate):
     db.add(db_sekolah)
     db.commit()
     db.refresh(db_sekolah)
+    sekolah_index.invalidate()
+    search_index.invalidate_sekolah()
+    stats_counters.on_sekolah_created(db_sekolah)
     return db_sekolah
 
 def update_sekolah(db: Session, sekolah_id: str, sekolah_in: schema_sekolah.SekolahUpdate):
@@ -35,6 +42,9 @@ def update_sekolah(db: Session, sekolah_id: str, sekolah_in: schema_sekolah.Seko
     db.add(db_sekolah)
     db.commit()
     db.refresh(db_sekolah)
+    sekolah_index.invalidate()
+    search_index.invalidate_sekolah()
+    stats_counters.on_sekolah_updated(db_sekolah)
     return db_sekolah
 
 def delete_sekolah(db: Session, sekolah_id: str):
@@ -42,4 +52,7 @@ def delete_sekolah(db: Session, sekolah_id: str):
     if db_sekolah:
         db.delete(db_sekolah)
         db.commit()
+        sekolah_index.invalidate()
+        search_index.invalidate_sekolah()
+        stats_counters.on_sekolah_deleted(db_sekolah)
     return db_sekolah
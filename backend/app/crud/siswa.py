@@ -2,6 +2,9 @@ from sqlalchemy.orm import Session
 from app.models.siswa import Siswa
 from app.schemas.user import UserCreate
 from app.crud import user as crud_user
+from app.services import identity
+from app.services.search import search_index
+from app.services.stats import stats_counters
 import uuid
 
 def get_siswa(db: Session, siswa_id: str):
@@ -19,16 +22,15 @@ def create_siswa(db: Session, siswa_data: dict, user_id: str):
     db.add(db_siswa)
     db.commit()
     db.refresh(db_siswa)
+    identity.invalidate(user_id)
+    search_index.on_siswa_saved(db_siswa)
+    stats_counters.on_siswa_created()
     return db_siswa
 
-from typing import Optional
-from app.models.pendaftaran import Pendaftaran
-from app.models.sekolah import Sekolah
+from typing import Optional, Sequence
+from app.crud.pagination import Cursor, load_fields, paginate
+from app.crud.scope import scope_siswa
 
-def get_siswa_list(db: Session, skip: int = 0, limit: int = 100, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None):
-    query = db.query(Siswa)
-    if sekolah_id:
-        query = query.join(Pendaftaran).filter(Pendaftaran.sekolah_id == sekolah_id)
-    elif dinas_id:
-        query = query.join(Pendaftaran).join(Sekolah).filter(Sekolah.dinas_id == dinas_id)
-    return query.offset(skip).limit(limit).all()
+def get_siswa_list(db: Session, skip: int = 0, limit: int = 100, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None, after: Optional[Cursor] = None, fields: Optional[Sequence[str]] = None):
+    query = scope_siswa(load_fields(db.query(Siswa), Siswa, fields), dinas_id=dinas_id, sekolah_id=sekolah_id)
+    return paginate(query, Siswa, skip=skip, limit=limit, after=after).all()
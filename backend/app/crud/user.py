@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash
+from app.services import identity
+from app.services.stats import stats_counters
+from app.crud.pagination import Cursor, load_fields, paginate
 import uuid
 
 def get_user_by_email(db: Session, email: str):
@@ -26,13 +29,24 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    stats_counters.on_user_created(db_user)
     return db_user
 
-def get_multi(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    return db.query(User).offset(skip).limit(limit).all()
+def get_multi(db: Session, skip: int = 0, limit: int = 100, after: Optional[Cursor] = None, fields: Optional[Sequence[str]] = None) -> List[User]:
+    query = load_fields(db.query(User), User, fields)
+    return paginate(query, User, skip=skip, limit=limit, after=after).all()
+
+# Changing any of these revokes the user's existing access tokens.
+TOKEN_SCOPE_FIELDS = ("role", "dinas_id", "sekolah_id", "is_active")
 
 def update_user(db: Session, db_user: User, user_in: UserUpdate) -> User:
     update_data = user_in.model_dump(exclude_unset=True)
+    old_role = db_user.role
+    if "password" in update_data or any(
+        field in update_data and update_data[field] != getattr(db_user, field)
+        for field in TOKEN_SCOPE_FIELDS
+    ):
+        db_user.token_version = (db_user.token_version or 0) + 1
     if "password" in update_data:
         hashed_password = get_password_hash(update_data["password"])
         db_user.hashed_password = hashed_password
@@ -44,6 +58,8 @@ def update_user(db: Session, db_user: User, user_in: UserUpdate) -> User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    identity.invalidate(db_user.id)
+    stats_counters.on_user_role_changed(old_role, db_user.role)
     return db_user
 
 def delete_user(db: Session, user_id: str) -> Optional[User]:
@@ -51,4 +67,6 @@ def delete_user(db: Session, user_id: str) -> Optional[User]:
     if db_user:
         db.delete(db_user)
         db.commit()
+        identity.invalidate(user_id)
+        stats_counters.on_user_deleted(db_user)
     return db_user
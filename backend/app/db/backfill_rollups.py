@@ -0,0 +1,33 @@
+import argparse
+import sys
+import os
+import time
+
+# Add current directory to sys.path
+sys.path.append(os.path.join(os.getcwd(), "."))
+
+from app.db.base import Base  # registers every model
+from app.db.session import SessionLocal
+from app.services import rollup
+
+def backfill(tahun_ajaran_id=None):
+    """
+    Rebuild the pendaftaran rollup buckets from the pendaftaran table, for
+    one tahun ajaran or all of them. Safe to re-run: the buckets in scope
+    are replaced in one transaction. Registrations written meanwhile by a
+    running app may be missed; run it again afterwards or off-peak.
+    """
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counted = rollup.rebuild(db, tahun_ajaran_id)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Rollup backfill completed: {counted} pendaftaran counted in {time.perf_counter() - started:.1f}s.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the pendaftaran rollup (time series) buckets.")
+    parser.add_argument("--tahun-ajaran", dest="tahun_ajaran_id", default=None, help="only this tahun ajaran id")
+    args = parser.parse_args()
+    backfill(args.tahun_ajaran_id)
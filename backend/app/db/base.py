@@ -10,3 +10,4 @@ from app.models.pendaftaran import Pendaftaran
 from app.models.kuota import Kuota
 from app.models.pengumuman import Pengumuman
 from app.models.berita import Berita
+from app.models.rollup import PendaftaranRollup
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Type
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram; the last bucket is open.
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Recent checkout waits kept for percentiles.
+WAIT_SAMPLES = 2048
+
+_registry: List["PoolMetrics"] = []
+
+class PoolMetrics:
+    """
+    Counters of one engine's connection pool in this worker: checkout wait
+    times, connections in use, overflow usage and checkout timeouts.
+    Every instance is registered for `pool_stats`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._waits: deque = deque(maxlen=WAIT_SAMPLES)
+        _registry.append(self)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if ms <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[bucket] += 1
+            self._waits.append(seconds)
+
+    def attach(self, engine: Engine) -> None:
+        """
+        Listen to the pool events of `engine`. Listeners set on the engine
+        survive `engine.dispose()`, which replaces the pool.
+        """
+        self.engine = engine
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            overflow = _overflow(engine.pool)
+            with self._lock:
+                self.checkouts += 1
+                self.in_use += 1
+                self.peak_in_use = max(self.peak_in_use, self.in_use)
+                self.peak_overflow = max(self.peak_overflow, overflow)
+
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.in_use = max(0, self.in_use - 1)
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            waits = sorted(self._waits)
+            measured = sum(self.wait_buckets)
+            return {
+                "name": self.name,
+                "pid": os.getpid(),
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "pool_size": pool.size() if isinstance(pool, QueuePool) else None,
+                "max_overflow": getattr(pool, "_max_overflow", None),
+                "timeout": pool.timeout() if isinstance(pool, QueuePool) else None,
+                "checked_out": pool.checkedout() if isinstance(pool, QueuePool) else self.in_use,
+                "checked_in": pool.checkedin() if isinstance(pool, QueuePool) else None,
+                "overflow": _overflow(pool),
+                "peak_checked_out": self.peak_in_use,
+                "peak_overflow": self.peak_overflow,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "count": measured,
+                    "avg": round(self.wait_total / measured * 1000, 3) if measured else None,
+                    "max": round(self.wait_max * 1000, 3),
+                    "p50": _percentile_ms(waits, 50),
+                    "p95": _percentile_ms(waits, 95),
+                    "p99": _percentile_ms(waits, 99),
+                    "buckets": {
+                        (f"le_{bound}" if i < len(WAIT_BUCKETS_MS) else f"gt_{WAIT_BUCKETS_MS[-1]}"): count
+                        for i, (bound, count) in enumerate(zip(WAIT_BUCKETS_MS + (None,), self.wait_buckets))
+                    },
+                },
+            }
+
+def _overflow(pool: Optional[Pool]) -> int:
+    # QueuePool.overflow() counts from -pool_size until the pool is full.
+    if isinstance(pool, QueuePool):
+        return max(0, pool.overflow())
+    return 0
+
+def _percentile_ms(ordered: List[float], pct: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, 3)
+
+def timed_pool_class(base: Type[QueuePool], metrics: PoolMetrics) -> Type[QueuePool]:
+    """
+    Subclass of `base` that reports how long each checkout waited for a
+    connection. The pool events only fire once a connection is handed out,
+    so the wait is measured around `Pool.connect`.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = base.connect(self)
+        except exc.TimeoutError:
+            metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    return type(f"Timed{base.__name__}", (base,), {"connect": connect})
+
+def pool_stats() -> List[Dict[str, Any]]:
+    return [metrics.stats() for metrics in _registry]
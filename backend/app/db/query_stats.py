@@ -0,0 +1,74 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryStats:
+    """
+    SQL statements executed inside one `track()` block (usually a request)
+    and the time spent in the database driver.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 2)
+
+    def repeated(self, threshold: int) -> list:
+        """
+        Statements executed at least `threshold` times, most frequent first.
+        The same SQL run once per row is the signature of an N+1 lazy load.
+        """
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Registered on the Engine class, so every engine (sync, async, replica)
+# reports into the QueryStats of the running request.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_started_at")
+    if stats is None or not started:
+        return
+    stats.duration += time.perf_counter() - started.pop()
+    stats.count += 1
+    stats.statements[statement] += 1
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    started = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started:
+        started.pop()
+
+@contextmanager
+def track() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """
+    Fail with AssertionError when the block runs more than `limit` statements.
+    """
+    with track() as stats:
+        yield stats
+    if stats.count > limit:
+        top = "\n".join(f"  {n}x {sql}" for sql, n in stats.statements.most_common(5))
+        raise AssertionError(f"{stats.count} queries executed, expected at most {limit}:\n{top}")
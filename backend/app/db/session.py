@@ -1,14 +1,91 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.db.pool import PoolMetrics, timed_pool_class
 
+def pool_options(url: str, pool_class, metrics: PoolMetrics) -> dict:
+    """
+    Engine keyword arguments for the pool settings. In-memory SQLite keeps
+    the single connection pool SQLAlchemy picks for it.
+    """
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        poolclass=timed_pool_class(pool_class, metrics),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+    return options
+
+pool_metrics = PoolMetrics("primary")
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
+    **pool_options(settings.DATABASE_URL, QueuePool, pool_metrics),
 )
+pool_metrics.attach(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the sync ones we use
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_url(url: str) -> str:
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+def get_async_database_url() -> str:
+    if settings.DATABASE_ASYNC_URL:
+        return settings.DATABASE_ASYNC_URL
+    return async_url(settings.DATABASE_URL)
+
+async_pool_metrics = PoolMetrics("primary_async")
+async_engine = create_async_engine(
+    get_async_database_url(),
+    **pool_options(get_async_database_url(), AsyncAdaptedQueuePool, async_pool_metrics),
+)
+async_pool_metrics.attach(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read-only endpoints use the replica when one is configured, otherwise the
+# replica sessions are bound to the primary engines.
+replica_engine = engine
+async_replica_engine = async_engine
+if settings.DATABASE_REPLICA_URL:
+    replica_pool_metrics = PoolMetrics("replica")
+    replica_engine = create_engine(
+        settings.DATABASE_REPLICA_URL,
+        **pool_options(settings.DATABASE_REPLICA_URL, QueuePool, replica_pool_metrics),
+    )
+    replica_pool_metrics.attach(replica_engine)
+
+    replica_async_url = async_url(settings.DATABASE_REPLICA_URL)
+    async_replica_pool_metrics = PoolMetrics("replica_async")
+    async_replica_engine = create_async_engine(
+        replica_async_url,
+        **pool_options(replica_async_url, AsyncAdaptedQueuePool, async_replica_pool_metrics),
+    )
+    async_replica_pool_metrics.attach(async_replica_engine.sync_engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+AsyncReplicaSessionLocal = async_sessionmaker(
+    bind=async_replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
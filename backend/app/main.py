@@ -1,14 +1,54 @@
-from fastapi import FastAPI
+import logging
+from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.api import api_router
+from app.core.security import shutdown_password_pool
+from app.db import query_stats
+from app.services.hasil import hasil_store
+from app.services.search import search_index
+from app.services.stats import stats_counters
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.APP_NAME,
     openapi_url="/openapi.json"
 )
 
+def _log_if_slow(request: Request, stats: query_stats.QueryStats) -> None:
+    repeated = stats.repeated(settings.N_PLUS_ONE_THRESHOLD)
+    if repeated or stats.count > settings.SLOW_REQUEST_QUERY_COUNT or stats.duration_ms > settings.SLOW_REQUEST_DB_MS:
+        logger.warning(
+            "%s %s ran %d queries in %.1fms%s",
+            request.method, request.url.path, stats.count, stats.duration_ms,
+            "".join(f"\n  {n}x {sql}" for sql, n in repeated[:3]),
+        )
+
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    with query_stats.track() as stats:
+        response = await call_next(request)
+    # A StreamingResponse (no Content-Length) runs most of its queries while
+    # the body is sent, after the headers: leave the headers off rather than
+    # report a partial count, and log once the body is done.
+    if "content-length" not in response.headers and response.status_code not in (204, 304):
+        body = response.body_iterator
+
+        async def log_after_body():
+            async for chunk in body:
+                yield chunk
+            _log_if_slow(request, stats)
+
+        response.body_iterator = log_after_body()
+        return response
+    if settings.query_stats_headers:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = str(stats.duration_ms)
+    _log_if_slow(request, stats)
+    return response
+
 # Set CORS origins
 app.add_middleware(
     CORSMiddleware,
@@ -16,11 +56,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "X-Next-Cursor"],
 )
 
 app.include_router(api_router, prefix="/api")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
+@app.on_event("startup")
+def load_hasil_snapshot():
+    hasil_store.load()
+
+@app.on_event("startup")
+def start_stats_reconciliation():
+    stats_counters.start()
+
+@app.on_event("startup")
+def start_search_index():
+    search_index.start()
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    shutdown_password_pool()
+
+@app.on_event("shutdown")
+def stop_stats_reconciliation():
+    stats_counters.stop()
+
+@app.on_event("shutdown")
+def stop_search_index():
+    search_index.stop()
+
 @app.get("/health")
 def health_check():
     return {"status": "ok", "app": settings.APP_NAME}
@@ -0,0 +1,24 @@
+"""Add token_version to users
+
+Revision ID: 3f9c1d7a2b64
+Revises: edc49cd42e58
+Create Date: 2026-10-18 09:12:40.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1d7a2b64'
+down_revision = 'edc49cd42e58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
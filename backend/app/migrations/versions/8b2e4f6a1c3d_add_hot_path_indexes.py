@@ -0,0 +1,55 @@
+"""Add hot path indexes
+
+Revision ID: 8b2e4f6a1c3d
+Revises: 3f9c1d7a2b64
+Create Date: 2026-10-18 14:03:27.114862
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4f6a1c3d'
+down_revision = '3f9c1d7a2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_pendaftaran_sekolah_id_status', 'pendaftaran', ['sekolah_id', 'status'], unique=False)
+    op.create_index('ix_pendaftaran_siswa_id', 'pendaftaran', ['siswa_id'], unique=False)
+    op.create_index('ix_pendaftaran_tahun_ajaran_id_status', 'pendaftaran', ['tahun_ajaran_id', 'status'], unique=False)
+    op.create_index('ix_sekolah_dinas_id', 'sekolah', ['dinas_id'], unique=False)
+    op.create_index('ix_siswa_user_id', 'siswa', ['user_id'], unique=False)
+    op.create_index('ix_kuota_sekolah_id_jalur_id_tahun_ajaran', 'kuota', ['sekolah_id', 'jalur_id', 'tahun_ajaran'], unique=False)
+    op.create_index('ix_pengumuman_is_published_created_at', 'pengumuman', ['is_published', 'created_at'], unique=False)
+    op.create_index('ix_berita_is_published_created_at', 'berita', ['is_published', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_berita_is_published_created_at', table_name='berita')
+    op.drop_index('ix_pengumuman_is_published_created_at', table_name='pengumuman')
+    # MySQL drops its implicit foreign key indexes once one of the indexes
+    # below covers the column, and refuses to drop the last one left.
+    _keep_foreign_key_index('kuota', 'sekolah_id', 'ix_kuota_sekolah_id_jalur_id_tahun_ajaran')
+    op.drop_index('ix_kuota_sekolah_id_jalur_id_tahun_ajaran', table_name='kuota')
+    _keep_foreign_key_index('siswa', 'user_id', 'ix_siswa_user_id')
+    op.drop_index('ix_siswa_user_id', table_name='siswa')
+    _keep_foreign_key_index('sekolah', 'dinas_id', 'ix_sekolah_dinas_id')
+    op.drop_index('ix_sekolah_dinas_id', table_name='sekolah')
+    _keep_foreign_key_index('pendaftaran', 'tahun_ajaran_id', 'ix_pendaftaran_tahun_ajaran_id_status')
+    op.drop_index('ix_pendaftaran_tahun_ajaran_id_status', table_name='pendaftaran')
+    _keep_foreign_key_index('pendaftaran', 'siswa_id', 'ix_pendaftaran_siswa_id')
+    op.drop_index('ix_pendaftaran_siswa_id', table_name='pendaftaran')
+    _keep_foreign_key_index('pendaftaran', 'sekolah_id', 'ix_pendaftaran_sekolah_id_status')
+    op.drop_index('ix_pendaftaran_sekolah_id_status', table_name='pendaftaran')
+
+
+def _keep_foreign_key_index(table: str, column: str, dropping: str) -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'mysql':
+        return
+    indexes = sa.inspect(bind).get_indexes(table)
+    if not any(ix['name'] != dropping and ix['column_names'][:1] == [column] for ix in indexes):
+        op.create_index(f'{table}_{column}_fk', table, [column], unique=False)
@@ -0,0 +1,24 @@
+"""Add pendaftaran ranking index
+
+Revision ID: b4d6f8a0c2e3
+Revises: f3b5d7e9a1c2
+Create Date: 2026-10-18 21:05:12.534871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d6f8a0c2e3'
+down_revision = 'f3b5d7e9a1c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_pendaftaran_sekolah_id_jalur_id_updated_at', 'pendaftaran', ['sekolah_id', 'jalur_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pendaftaran_sekolah_id_jalur_id_updated_at', table_name='pendaftaran')
@@ -0,0 +1,34 @@
+"""Add keyset pagination indexes
+
+Revision ID: c5d7e9f1a2b4
+Revises: 8b2e4f6a1c3d
+Create Date: 2026-10-18 15:21:09.583017
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d7e9f1a2b4'
+down_revision = '8b2e4f6a1c3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_pendaftaran_created_at_id', 'pendaftaran', ['created_at', 'id'], unique=False)
+    op.create_index('ix_pendaftaran_sekolah_id_created_at_id', 'pendaftaran', ['sekolah_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_siswa_created_at_id', 'siswa', ['created_at', 'id'], unique=False)
+    op.create_index('ix_sekolah_created_at_id', 'sekolah', ['created_at', 'id'], unique=False)
+    op.create_index('ix_sekolah_dinas_id_created_at_id', 'sekolah', ['dinas_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_sekolah_dinas_id_created_at_id', table_name='sekolah')
+    op.drop_index('ix_sekolah_created_at_id', table_name='sekolah')
+    op.drop_index('ix_siswa_created_at_id', table_name='siswa')
+    op.drop_index('ix_pendaftaran_sekolah_id_created_at_id', table_name='pendaftaran')
+    op.drop_index('ix_pendaftaran_created_at_id', table_name='pendaftaran')
@@ -0,0 +1,24 @@
+"""Add siswa updated_at index
+
+Revision ID: e2a4c6b8d0f1
+Revises: c5d7e9f1a2b4
+Create Date: 2026-10-18 17:02:44.118730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a4c6b8d0f1'
+down_revision = 'c5d7e9f1a2b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_siswa_updated_at', 'siswa', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_siswa_updated_at', table_name='siswa')
@@ -0,0 +1,38 @@
+"""Add pendaftaran rollup
+
+Revision ID: f3b5d7e9a1c2
+Revises: e2a4c6b8d0f1
+Create Date: 2026-10-18 19:11:37.402215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b5d7e9a1c2'
+down_revision = 'e2a4c6b8d0f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('pendaftaran_rollup',
+    sa.Column('granularity', sa.String(length=6), nullable=False),
+    sa.Column('tahun_ajaran_id', sa.String(length=36), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('dinas_id', sa.String(length=36), nullable=False),
+    sa.Column('sekolah_id', sa.String(length=36), nullable=False),
+    sa.Column('jalur_id', sa.String(length=36), nullable=False),
+    sa.Column('status', sa.String(length=30), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('granularity', 'tahun_ajaran_id', 'bucket_start', 'dinas_id', 'sekolah_id', 'jalur_id', 'status')
+    )
+    op.create_index('ix_pendaftaran_rollup_dinas_id', 'pendaftaran_rollup', ['granularity', 'dinas_id', 'bucket_start'], unique=False)
+    op.create_index('ix_pendaftaran_rollup_sekolah_id', 'pendaftaran_rollup', ['granularity', 'sekolah_id', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pendaftaran_rollup_sekolah_id', table_name='pendaftaran_rollup')
+    op.drop_index('ix_pendaftaran_rollup_dinas_id', table_name='pendaftaran_rollup')
+    op.drop_table('pendaftaran_rollup')
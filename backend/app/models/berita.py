@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, Text, Index
 from sqlalchemy.sql import func
 from app.db.session import Base
 
 class Berita(Base):
     __tablename__ = "berita"
+    __table_args__ = (
+        Index("ix_berita_is_published_created_at", "is_published", "created_at"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     dinas_id = Column(String(36), ForeignKey("dinas.id"), nullable=True)
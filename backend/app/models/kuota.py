@@ -1,8 +1,11 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
 from app.db.session import Base
 
 class Kuota(Base):
     __tablename__ = "kuota"
+    __table_args__ = (
+        Index("ix_kuota_sekolah_id_jalur_id_tahun_ajaran", "sekolah_id", "jalur_id", "tahun_ajaran"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     sekolah_id = Column(String(36), ForeignKey("sekolah.id"), nullable=False)
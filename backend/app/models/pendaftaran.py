@@ -1,10 +1,18 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
 class Pendaftaran(Base):
     __tablename__ = "pendaftaran"
+    __table_args__ = (
+        Index("ix_pendaftaran_sekolah_id_status", "sekolah_id", "status"),
+        Index("ix_pendaftaran_siswa_id", "siswa_id"),
+        Index("ix_pendaftaran_tahun_ajaran_id_status", "tahun_ajaran_id", "status"),
+        Index("ix_pendaftaran_created_at_id", "created_at", "id"),
+        Index("ix_pendaftaran_sekolah_id_created_at_id", "sekolah_id", "created_at", "id"),
+        Index("ix_pendaftaran_sekolah_id_jalur_id_updated_at", "sekolah_id", "jalur_id", "updated_at"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     siswa_id = Column(String(36), ForeignKey("siswa.id"), nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime, Integer, Index
+from app.db.session import Base
+
+# Pendaftaran created per minute / hour / day, by tahun ajaran, dinas,
+# sekolah, jalur and current status. Maintained by app.services.rollup.
+class PendaftaranRollup(Base):
+    __tablename__ = "pendaftaran_rollup"
+    __table_args__ = (
+        Index("ix_pendaftaran_rollup_dinas_id", "granularity", "dinas_id", "bucket_start"),
+        Index("ix_pendaftaran_rollup_sekolah_id", "granularity", "sekolah_id", "bucket_start"),
+    )
+
+    # The whole key is the primary key, so buckets can be upserted.
+    granularity = Column(String(6), primary_key=True)  # minute, hour, day
+    tahun_ajaran_id = Column(String(36), primary_key=True)
+    bucket_start = Column(DateTime, primary_key=True)
+    dinas_id = Column(String(36), primary_key=True)
+    sekolah_id = Column(String(36), primary_key=True)
+    jalur_id = Column(String(36), primary_key=True)
+    status = Column(String(30), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
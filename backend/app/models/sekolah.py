@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, Float
+from sqlalchemy import Column, String, DateTime, ForeignKey, Enum as SQLEnum, Float, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -10,6 +10,11 @@ class Jenjang(str, enum.Enum):
 
 class Sekolah(Base):
     __tablename__ = "sekolah"
+    __table_args__ = (
+        Index("ix_sekolah_dinas_id", "dinas_id"),
+        Index("ix_sekolah_created_at_id", "created_at", "id"),
+        Index("ix_sekolah_dinas_id_created_at_id", "dinas_id", "created_at", "id"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     dinas_id = Column(String(36), ForeignKey("dinas.id"), nullable=False)
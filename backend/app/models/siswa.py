@@ -1,10 +1,15 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Date, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Date, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
 class Siswa(Base):
     __tablename__ = "siswa"
+    __table_args__ = (
+        Index("ix_siswa_user_id", "user_id"),
+        Index("ix_siswa_created_at_id", "created_at", "id"),
+        Index("ix_siswa_updated_at", "updated_at"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from app.db.session import Base
 import enum
@@ -11,6 +11,9 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(String(36), primary_key=True, index=True)
     email = Column(String(255), unique=True, index=True, nullable=False)
@@ -22,6 +25,9 @@ class User(Base):
     avatar = Column(String(255), nullable=True)
     phone = Column(String(20), nullable=True)
     is_active = Column(Boolean, default=True)
+    # Bumped whenever role, scope, activation or password change; tokens
+    # carrying an older version are rejected
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
     last_login_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class PengumumanBase(BaseModel):
+    judul: str
+    isi: str
+    tipe: str
+    is_published: bool = True
+
+class Pengumuman(PengumumanBase):
+    id: str
+    published_at: datetime
+    class Config:
+        from_attributes = True
+
+class BeritaBase(BaseModel):
+    judul: str
+    slug: str
+    ringkasan: Optional[str] = None
+    isi: str
+    gambar: Optional[str] = None
+    is_published: bool = True
+
+class Berita(BeritaBase):
+    id: str
+    published_at: datetime
+    class Config:
+        from_attributes = True
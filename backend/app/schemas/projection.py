@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Type
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+# Always part of a projection, rows stay addressable.
+ALWAYS_INCLUDED = ("id",)
+
+def parse_fields(schema: Type[BaseModel], fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    `fields=a,b,c` query value as a tuple of field names of `schema`, in
+    request order with "id" first; None when no projection was asked for.
+    Raises ValueError naming the unknown fields.
+    """
+    if not fields:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted({name for name in requested if name not in schema.model_fields})
+    if unknown:
+        raise ValueError(", ".join(unknown))
+    return tuple(dict.fromkeys((*ALWAYS_INCLUDED, *requested)))
+
+@lru_cache(maxsize=256)
+def projection_model(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Subset of `schema` with only `fields`, built once per combination.
+    """
+    return create_model(
+        f"{schema.__name__}Projection",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields},
+    )
+
+@lru_cache(maxsize=256)
+def _list_adapter(schema: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(List[projection_model(schema, fields)])
+
+def dump_json(schema: Type[BaseModel], fields: Tuple[str, ...], items: Iterable) -> bytes:
+    """
+    Serialize ORM rows (or any objects with those attributes) straight to JSON.
+    """
+    adapter = _list_adapter(schema, fields)
+    return adapter.dump_json(adapter.validate_python(list(items), from_attributes=True))
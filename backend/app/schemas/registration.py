@@ -1,6 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from typing import Dict, Optional, List
+from datetime import date, datetime
 
 # Jalur Schemas
 class JalurBase(BaseModel):
@@ -75,3 +75,45 @@ class Pendaftaran(PendaftaranBase):
 
     class Config:
         from_attributes = True
+
+class PendaftaranFilter(BaseModel):
+    status: Optional[str] = None
+    jalur_id: Optional[str] = None
+    sekolah_id: Optional[str] = None
+    # Inclusive range of the created_at date
+    created_from: Optional[date] = None
+    created_to: Optional[date] = None
+
+class PendaftaranFacets(BaseModel):
+    # value -> count; each facet applies every filter except its own
+    status: Dict[str, int]
+    jalur: Dict[str, int]
+    sekolah: Dict[str, int]
+
+class PendaftaranRanking(BaseModel):
+    pendaftaran_id: str
+    sekolah_id: str
+    jalur_id: str
+    peringkat: int
+    total_pendaftar: int
+    kuota: int
+    sisa_kuota: int
+    skor: Optional[float] = None
+    skor_batas: Optional[float] = None
+    dalam_kuota: bool
+
+# Seleksi Schemas
+class SeleksiGroup(BaseModel):
+    sekolah_id: str
+    jalur_id: str
+    kuota: int
+    pendaftar: int
+    diterima: int
+
+class SeleksiResult(BaseModel):
+    tahun_ajaran_id: str
+    dry_run: bool
+    total: int
+    diterima: int
+    tidak_diterima: int
+    groups: List[SeleksiGroup]
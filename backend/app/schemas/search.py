@@ -0,0 +1,25 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.models.sekolah import Jenjang
+
+class SiswaHit(BaseModel):
+    id: str
+    nisn: str
+    nama_lengkap: str
+    asal_sekolah: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class SekolahHit(BaseModel):
+    id: str
+    npsn: str
+    name: str
+    jenjang: Jenjang
+
+    class Config:
+        from_attributes = True
+
+class SearchResult(BaseModel):
+    siswa: List[SiswaHit]
+    sekolah: List[SekolahHit]
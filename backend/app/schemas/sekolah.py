@@ -95,3 +95,13 @@ class Sekolah(SekolahBase):
 
     class Config:
         from_attributes = True
+
+class SekolahZonasi(BaseModel):
+    id: str
+    npsn: str
+    name: str
+    jenjang: Jenjang
+    alamat: str
+    lat: float
+    lng: float
+    jarak: float # km
@@ -0,0 +1,41 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class TimeseriesPoint(BaseModel):
+    bucket: datetime
+    count: int
+
+class TimeseriesSeries(BaseModel):
+    key: str
+    points: List[TimeseriesPoint]
+
+class Timeseries(BaseModel):
+    granularity: str
+    start: datetime
+    end: datetime
+    group_by: Optional[str] = None
+    series: List[TimeseriesSeries]
+
+class KuotaFillJalur(BaseModel):
+    jalur_id: str
+    jalur: str
+    kuota: int
+    terisi: int
+    pending: int
+    applicants: int
+    fill_rate: Optional[float] = None
+
+class KuotaFillSekolah(BaseModel):
+    sekolah_id: str
+    npsn: str
+    name: str
+    kuota: int
+    terisi: int
+    pending: int
+    applicants: int
+    fill_rate: Optional[float] = None
+    jalur: List[KuotaFillJalur]
+
+class KuotaFill(BaseModel):
+    sekolah: List[KuotaFillSekolah]
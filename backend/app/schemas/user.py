@@ -24,6 +24,7 @@ class UserUpdate(BaseModel):
     dinas_id: Optional[str] = None
     sekolah_id: Optional[str] = None
     password: Optional[str] = None
+    is_active: Optional[bool] = None
 
 class UserInDB(UserBase):
     id: str
@@ -33,3 +34,12 @@ class UserInDB(UserBase):
 
     class Config:
         from_attributes = True
+
+class Principal(BaseModel):
+    """
+    Caller identity and tenant scope, resolved from the access token.
+    """
+    id: str
+    role: UserRole
+    dinas_id: Optional[str] = None
+    sekolah_id: Optional[str] = None
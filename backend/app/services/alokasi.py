@@ -0,0 +1,114 @@
+import heapq
+from typing import Dict, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.jalur import Jalur
+from app.models.tahun_ajaran import TahunAjaran
+from app.schemas import registration as schema_reg
+from app.services import seleksi
+
+def deferred_acceptance(
+    student: np.ndarray,
+    preference: np.ndarray,
+    group: np.ndarray,
+    priority: np.ndarray,
+    capacity: np.ndarray,
+) -> np.ndarray:
+    """
+    Student-proposing deferred acceptance (Gale-Shapley).
+
+    One entry per application: `student` and `group` are integer codes,
+    `preference` orders a student's applications (lower is preferred) and
+    `priority` is the group-side rank (lower is better, unique per group).
+    `capacity[g]` is the number of seats of group g. Returns a boolean mask
+    of the applications that hold a seat in the final, student-optimal
+    stable matching.
+    """
+    n = len(student)
+    accepted = np.zeros(n, dtype=bool)
+    if n == 0:
+        return accepted
+
+    # Applications grouped per student, best choice first.
+    order = np.lexsort((preference, student))
+    sorted_student = student[order]
+    n_students = int(sorted_student[-1]) + 1
+    starts = np.searchsorted(sorted_student, np.arange(n_students), side="left")
+    ends = np.searchsorted(sorted_student, np.arange(n_students), side="right")
+
+    # Plain Python lists: scalar indexing is much faster than on ndarrays.
+    order_l = order.tolist()
+    group_l = group.tolist()
+    priority_l = priority.tolist()
+    student_l = student.tolist()
+    capacity_l = capacity.tolist()
+    next_choice = starts.tolist()
+    ends_l = ends.tolist()
+
+    # Per group a max-heap (by priority rank) of the applications it holds.
+    held = [[] for _ in range(len(capacity_l))]
+    free = [s for s in range(n_students) if next_choice[s] < ends_l[s]]
+
+    while free:
+        s = free.pop()
+        while next_choice[s] < ends_l[s]:
+            app = order_l[next_choice[s]]
+            next_choice[s] += 1
+            g = group_l[app]
+            cap = capacity_l[g]
+            if cap <= 0:
+                continue
+            heap = held[g]
+            rank = priority_l[app]
+            if len(heap) < cap:
+                heapq.heappush(heap, (-rank, app))
+                break
+            if -heap[0][0] > rank:
+                _, displaced = heapq.heapreplace(heap, (-rank, app))
+                free.append(student_l[displaced])
+                break
+
+    for heap in held:
+        for _, app in heap:
+            accepted[app] = True
+    return accepted
+
+def run_alokasi(db: Session, tahun_ajaran_id: str, dry_run: bool = False) -> Optional[schema_reg.SeleksiResult]:
+    """
+    Resolve every siswa's registrations of a tahun ajaran into at most one
+    placement with deferred acceptance. A siswa's choices are ordered by
+    submission time (first registration = first choice); schools rank
+    applicants with the same order as the per-school seleksi.
+    Returns None when the tahun ajaran does not exist.
+    """
+    tahun_ajaran = db.query(TahunAjaran).filter(TahunAjaran.id == tahun_ajaran_id).first()
+    if not tahun_ajaran:
+        return None
+
+    cols = seleksi.load_registrations(db, tahun_ajaran_id)
+    if cols is None:
+        return seleksi.empty_result(tahun_ajaran_id, dry_run)
+
+    jalur_type_by_id = dict(db.query(Jalur.id, Jalur.type).all())
+    kuota_by_pair = seleksi.load_kuota(db, tahun_ajaran.tahun)
+    accepted_before = seleksi.load_accepted(db, tahun_ajaran_id)
+
+    codes, rank, group_keys = seleksi.rank_groups(cols, jalur_type_by_id)
+    capacity = seleksi.remaining_capacity(group_keys, kuota_by_pair, accepted_before)
+
+    student_index: Dict[str, int] = {}
+    student = np.fromiter(
+        (student_index.setdefault(s, len(student_index)) for s in cols["siswa_id"].tolist()),
+        dtype=np.int64,
+        count=len(codes),
+    )
+    # Rank each siswa's applications by submission, then creation time.
+    preference = np.lexsort((cols["created_at"], cols["submitted_at"]))
+    preference_rank = np.empty(len(preference), dtype=np.int64)
+    preference_rank[preference] = np.arange(len(preference))
+
+    accepted = deferred_acceptance(student, preference_rank, codes, rank, capacity)
+    return seleksi.apply_result(
+        db, tahun_ajaran_id, cols, codes, group_keys, capacity, kuota_by_pair, accepted_before, accepted, dry_run
+    )
@@ -0,0 +1,235 @@
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.crud.pendaftaran import apply_filters
+from app.crud.scope import sekolah_of_dinas
+from app.models.jalur import Jalur
+from app.models.pendaftaran import Pendaftaran
+from app.models.sekolah import Sekolah
+from app.models.siswa import Siswa
+from app.schemas.registration import PendaftaranFilter
+
+# Rows fetched per round trip from the server-side cursor; also the unit
+# in which the writers below produce output.
+BATCH_SIZE = 1000
+
+# (header, column) of every exported row, in sheet order.
+COLUMNS = [
+    ("No Pendaftaran", Pendaftaran.no_pendaftaran),
+    ("Status", Pendaftaran.status),
+    ("NISN", Siswa.nisn),
+    ("Nama Lengkap", Siswa.nama_lengkap),
+    ("Jenis Kelamin", Siswa.jenis_kelamin),
+    ("Asal Sekolah", Siswa.asal_sekolah),
+    ("NPSN Tujuan", Sekolah.npsn),
+    ("Sekolah Tujuan", Sekolah.name),
+    ("Jalur", Jalur.name),
+    ("Jarak ke Sekolah", Pendaftaran.jarak_ke_sekolah),
+    ("Nilai Rata-rata", Pendaftaran.nilai_rata),
+    ("Skor Zonasi", Pendaftaran.skor_zonasi),
+    ("Skor Prestasi", Pendaftaran.skor_prestasi),
+    ("Tanggal Daftar", Pendaftaran.created_at),
+    ("Tanggal Submit", Pendaftaran.submitted_at),
+    ("Tanggal Verifikasi", Pendaftaran.verified_at),
+]
+HEADERS = [header for header, _ in COLUMNS]
+
+# Control characters XML 1.0 does not allow, even escaped.
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def export_query(dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None, siswa_user_id: Optional[str] = None, filters: Optional[PendaftaranFilter] = None):
+    """
+    Pendaftaran joined with Siswa, Sekolah and Jalur as flat rows, scoped
+    and filtered like the pendaftaran list.
+    """
+    query = (
+        select(*(column for _, column in COLUMNS))
+        .select_from(Pendaftaran)
+        .join(Siswa, Pendaftaran.siswa_id == Siswa.id)
+        .join(Sekolah, Pendaftaran.sekolah_id == Sekolah.id)
+        .join(Jalur, Pendaftaran.jalur_id == Jalur.id)
+    )
+    if siswa_user_id:
+        query = query.where(Siswa.user_id == siswa_user_id)
+    elif sekolah_id:
+        query = query.where(Pendaftaran.sekolah_id == sekolah_id)
+    elif dinas_id:
+        # A semi-join keeps pendaftaran the driving table, read in
+        # (created_at, id) index order, so rows stream without a sort
+        # instead of the join starting from a scan of sekolah.
+        query = query.where(Pendaftaran.sekolah_id.in_(sekolah_of_dinas(dinas_id)))
+    return apply_filters(query, filters).order_by(Pendaftaran.created_at, Pendaftaran.id)
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return str(value)
+
+class CsvWriter:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self, headers: Sequence[str]):
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer)
+        # BOM so Excel opens the UTF-8 names correctly.
+        self._buffer.write("\ufeff")
+        self._csv.writerow(headers)
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    @staticmethod
+    def _cell(value):
+        text = _text(value)
+        # A leading =, +, - or @ in a text field would run as a formula.
+        if isinstance(value, str) and text[:1] in ("=", "+", "-", "@"):
+            return "'" + text
+        return text
+
+    def write_rows(self, rows: Iterable[Sequence]) -> bytes:
+        self._csv.writerows([self._cell(value) for value in row] for row in rows)
+        return self._take()
+
+    def close(self) -> bytes:
+        return self._take()
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only, unseekable file collecting what zipfile writes, so the
+    archive can be sent as it is produced (zipfile then uses data
+    descriptors instead of seeking back to fix up the local headers).
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Pendaftaran" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+class XlsxWriter:
+    """
+    Single sheet workbook written row by row into a deflated zip stream.
+    Cells are inline strings and plain numbers, so no shared string table
+    has to be kept in memory.
+    """
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+
+    def __init__(self, headers: Sequence[str]):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, "w", compression=zipfile.ZIP_DEFLATED)
+        for name, content in _XLSX_PARTS.items():
+            self._zip.writestr(name, content)
+        # Size unknown up front, so allow it to pass 2 GiB.
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+        self._write_row(headers)
+
+    @staticmethod
+    def _cell(value) -> str:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f"<c><v>{value}</v></c>"
+        if value is None:
+            return "<c/>"
+        text = escape(_XML_INVALID.sub("", _text(value)))
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def _write_row(self, row: Sequence) -> None:
+        self._sheet.write(("<row>" + "".join(self._cell(value) for value in row) + "</row>").encode("utf-8"))
+
+    def write_rows(self, rows: Iterable[Sequence]) -> bytes:
+        for row in rows:
+            self._write_row(row)
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.take()
+
+WRITERS = {"csv": CsvWriter, "xlsx": XlsxWriter}
+
+async def stream_export(session_factory: async_sessionmaker, query, fmt: str) -> AsyncIterator[bytes]:
+    """
+    Encoded export of `query` in `fmt` ("csv" or "xlsx"), one chunk per
+    BATCH_SIZE rows. Rows come from a server-side cursor and are never all
+    in memory. Opens its own session: the response body is produced after
+    the endpoint's dependencies have been closed.
+    """
+    writer = WRITERS[fmt](HEADERS)
+    async with session_factory() as db:
+        result = await db.stream(query.execution_options(yield_per=BATCH_SIZE))
+        async for rows in result.partitions():
+            chunk = writer.write_rows(rows)
+            if chunk:
+                yield chunk
+    yield writer.close()
@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from typing import List, NamedTuple
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http_cache import strong_etag
+from app.crud import common as crud_common
+from app.schemas import common as schema_common
+
+PENGUMUMAN = "pengumuman"
+BERITA = "berita"
+
+class Page(NamedTuple):
+    body: bytes
+    etag: str
+    # When this worker built the page, so a later rebuild never claims to
+    # be older than what a client already holds.
+    last_modified: datetime
+
+# Serialized pages, keyed by (feed, skip, limit). Cleared on every write
+# of this worker.
+feed_cache = TTLCache("feeds", maxsize=settings.FEED_CACHE_MAX_SIZE, ttl=settings.FEED_CACHE_TTL_SECONDS)
+
+# (crud list function, response list adapter) per feed.
+_FEEDS = {
+    PENGUMUMAN: (crud_common.get_pengumuman_list_async, TypeAdapter(List[schema_common.Pengumuman])),
+    BERITA: (crud_common.get_berita_list_async, TypeAdapter(List[schema_common.Berita])),
+}
+
+async def _build(session_factory: async_sessionmaker, feed: str, skip: int, limit: int) -> Page:
+    get_list, adapter = _FEEDS[feed]
+    async with session_factory() as db:
+        rows = await get_list(db, skip=skip, limit=limit)
+        body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    return Page(body, strong_etag(body), datetime.now(timezone.utc).replace(microsecond=0))
+
+async def get_page_async(session_factory: async_sessionmaker, feed: str, skip: int, limit: int) -> Page:
+    """
+    Cached page of `feed`, built once for concurrent misses with a session
+    from `session_factory`, which is only opened then.
+    """
+    return await feed_cache.get_or_compute_async(
+        (feed, skip, limit), lambda: _build(session_factory, feed, skip, limit)
+    )
+
+def invalidate() -> None:
+    """
+    Call after committing a Pengumuman or Berita write (publishing,
+    editing, deleting); pages are rebuilt on their next request.
+    """
+    feed_cache.clear()
@@ -0,0 +1,183 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Optional
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.pendaftaran import Pendaftaran
+from app.models.siswa import Siswa
+from app.models.sekolah import Sekolah
+from app.models.jalur import Jalur
+from app.models.tahun_ajaran import TahunAjaran
+from app.services.seleksi import STATUS_DITERIMA, STATUS_TIDAK_DITERIMA
+
+# File layout (little endian):
+#   header   magic(8s) count(u32) key_width(u32)
+#   keys     count * key_width bytes, sorted no_pendaftaran, NUL padded
+#   offsets  (count + 1) * u64 into the payload
+#   payload  pre-serialized JSON document of every result
+MAGIC = b"SPMBHSL1"
+HEADER = struct.Struct("<8sII")
+KEY_WIDTH = 50  # Pendaftaran.no_pendaftaran is String(50)
+
+# How often a worker checks whether another worker published a new snapshot.
+RELOAD_CHECK_SECONDS = 5
+
+def _mask_nisn(nisn: str) -> str:
+    if len(nisn) <= 4:
+        return nisn
+    return nisn[:2] + "*" * (len(nisn) - 4) + nisn[-2:]
+
+def build_snapshot(db: Session, tahun_ajaran_id: str, path: str) -> Optional[int]:
+    """
+    Write the final results of a tahun ajaran to `path` and return the
+    number of results, or None when the tahun ajaran does not exist.
+    The file is replaced atomically so running workers never see a partial one.
+    """
+    tahun_ajaran = db.query(TahunAjaran).filter(TahunAjaran.id == tahun_ajaran_id).first()
+    if not tahun_ajaran:
+        return None
+
+    rows = (
+        db.query(
+            Pendaftaran.no_pendaftaran,
+            Pendaftaran.status,
+            Siswa.nama_lengkap,
+            Siswa.nisn,
+            Sekolah.npsn,
+            Sekolah.name,
+            Jalur.name,
+        )
+        .join(Siswa, Pendaftaran.siswa_id == Siswa.id)
+        .join(Sekolah, Pendaftaran.sekolah_id == Sekolah.id)
+        .join(Jalur, Pendaftaran.jalur_id == Jalur.id)
+        .filter(
+            Pendaftaran.tahun_ajaran_id == tahun_ajaran_id,
+            Pendaftaran.status.in_((STATUS_DITERIMA, STATUS_TIDAK_DITERIMA)),
+        )
+        .yield_per(5000)
+    )
+
+    keys = []
+    chunks = []
+    for no_pendaftaran, status, nama, nisn, npsn, sekolah_name, jalur_name in rows:
+        document = json.dumps(
+            {
+                "no_pendaftaran": no_pendaftaran,
+                "tahun_ajaran": tahun_ajaran.tahun,
+                "nama_lengkap": nama,
+                "nisn": _mask_nisn(nisn),
+                "npsn": npsn,
+                "sekolah": sekolah_name,
+                "jalur": jalur_name,
+                "status": status,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        keys.append(no_pendaftaran.encode("utf-8"))
+        chunks.append(document)
+
+    # Sort by the encoded key so lookups can bisect on raw bytes.
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    key_array = np.array([keys[i] for i in order], dtype=f"S{KEY_WIDTH}")
+    sizes = [len(chunks[i]) for i in order]
+    offset_array = np.zeros(len(order) + 1, dtype="<u8")
+    np.cumsum(sizes, out=offset_array[1:])
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(order), KEY_WIDTH))
+        f.write(key_array.tobytes())
+        f.write(offset_array.tobytes())
+        for i in order:
+            f.write(chunks[i])
+    os.replace(tmp_path, path)
+    return len(order)
+
+class HasilSnapshot:
+    """
+    Read-only, memory-mapped view of a published result snapshot.
+    Lookups bisect the sorted key block and return the stored JSON bytes.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, key_width = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a hasil snapshot")
+        self.count = count
+        self.key_width = key_width
+        keys_at = HEADER.size
+        offsets_at = keys_at + count * key_width
+        self._payload_at = offsets_at + (count + 1) * 8
+        self._keys = np.frombuffer(self._mm, dtype=f"S{key_width}", count=count, offset=keys_at)
+        self._offsets = np.frombuffer(self._mm, dtype="<u8", count=count + 1, offset=offsets_at)
+
+    def get(self, no_pendaftaran: str) -> Optional[bytes]:
+        key = no_pendaftaran.encode("utf-8")
+        if len(key) > self.key_width:
+            return None
+        i = int(np.searchsorted(self._keys, key))
+        if i >= self.count or self._keys[i] != key:
+            return None
+        start = self._payload_at + int(self._offsets[i])
+        end = self._payload_at + int(self._offsets[i + 1])
+        return self._mm[start:end]
+
+class HasilStore:
+    """
+    The snapshot served by this worker. Picks up snapshots published by
+    other workers by re-checking the file every few seconds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot: Optional[HasilSnapshot] = None
+        self._version: Optional[tuple] = None
+        self._checked_at = 0.0
+
+    def load(self) -> bool:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._snapshot, self._version = None, None
+                return False
+            # os.replace gives every published snapshot a new inode
+            version = (stat.st_ino, stat.st_mtime_ns)
+            if version != self._version:
+                self._snapshot = HasilSnapshot(self.path)
+                self._version = version
+            return True
+
+    def get(self, no_pendaftaran: str) -> Optional[bytes]:
+        if time.monotonic() - self._checked_at > RELOAD_CHECK_SECONDS:
+            self.load()
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        return snapshot.get(no_pendaftaran)
+
+    @property
+    def is_published(self) -> bool:
+        return self._snapshot is not None
+
+hasil_store = HasilStore(settings.HASIL_SNAPSHOT_PATH)
+
+def publish(db: Session, tahun_ajaran_id: str) -> Optional[int]:
+    count = build_snapshot(db, tahun_ajaran_id, hasil_store.path)
+    if count is not None:
+        hasil_store.load()
+    return count
@@ -0,0 +1,78 @@
+from typing import Optional
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import MISSING, TTLCache
+from app.core.config import settings
+from app.models.user import User
+from app.models.siswa import Siswa
+
+# Column values of users and their siswa profile, keyed by user id. Entries
+# are plain dicts; every request gets its own transient ORM object, so
+# nothing is shared between sessions.
+identity_cache = TTLCache(
+    "identity",
+    maxsize=settings.IDENTITY_CACHE_MAX_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL_SECONDS,
+)
+
+def _columns(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(type(obj)).column_attrs}
+
+def get_user(db: Session, user_id: str) -> Optional[User]:
+    values = identity_cache.get(("user", user_id))
+    if values is MISSING:
+        db_user = db.query(User).filter(User.id == user_id).first()
+        values = _columns(db_user) if db_user else None
+        identity_cache.set(("user", user_id), values)
+    return User(**values) if values else None
+
+async def get_user_async(db: AsyncSession, user_id: str) -> Optional[User]:
+    values = identity_cache.get(("user", user_id))
+    if values is MISSING:
+        db_user = await db.scalar(select(User).where(User.id == user_id))
+        values = _columns(db_user) if db_user else None
+        identity_cache.set(("user", user_id), values)
+    return User(**values) if values else None
+
+def get_siswa_by_user_id(db: Session, user_id: str) -> Optional[Siswa]:
+    values = identity_cache.get(("siswa", user_id))
+    if values is MISSING:
+        db_siswa = db.query(Siswa).filter(Siswa.user_id == user_id).first()
+        values = _columns(db_siswa) if db_siswa else None
+        identity_cache.set(("siswa", user_id), values)
+    return Siswa(**values) if values else None
+
+# (token_version, is_active) per user id, checked for every scoped token.
+token_version_cache = TTLCache(
+    "token_version",
+    maxsize=settings.IDENTITY_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_VERSION_TTL_SECONDS,
+)
+
+def get_token_state(db: Session, user_id: str) -> Optional[tuple]:
+    """
+    (token_version, is_active) of a user, or None if the user does not exist.
+    """
+    state = token_version_cache.get(user_id)
+    if state is MISSING:
+        row = db.query(User.token_version, User.is_active).filter(User.id == user_id).first()
+        state = (row.token_version, row.is_active) if row else None
+        token_version_cache.set(user_id, state)
+    return state
+
+async def get_token_state_async(db: AsyncSession, user_id: str) -> Optional[tuple]:
+    state = token_version_cache.get(user_id)
+    if state is MISSING:
+        row = (await db.execute(
+            select(User.token_version, User.is_active).where(User.id == user_id)
+        )).first()
+        state = (row.token_version, row.is_active) if row else None
+        token_version_cache.set(user_id, state)
+    return state
+
+def invalidate(user_id: str) -> None:
+    identity_cache.invalidate(("user", user_id))
+    identity_cache.invalidate(("siswa", user_id))
+    token_version_cache.invalidate(user_id)
@@ -0,0 +1,242 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from sortedcontainers import SortedList
+from sqlalchemy import String, literal
+from sqlalchemy.orm import Session
+
+from app.models.pendaftaran import Pendaftaran
+from app.models.jalur import Jalur
+from app.models.kuota import Kuota
+from app.models.tahun_ajaran import TahunAjaran
+from app.services.seleksi import ELIGIBLE_STATUSES, priority_score
+
+# Registrations that currently hold a place in the live ranking: the ones
+# seleksi will rank.
+RANKED_STATUSES = ELIGIBLE_STATUSES
+
+# Other workers do not notify us, so pick up their changes to a group at
+# least this often (only the rows updated since the last look are read).
+MAX_GROUP_AGE_SECONDS = 30
+
+# How far before the watermark a refresh starts reading.
+WATERMARK_SLACK_SECONDS = 5
+
+# What the ranking needs of a pendaftaran.
+RANKING_COLUMNS = (
+    Pendaftaran.id,
+    Pendaftaran.status,
+    Pendaftaran.skor_zonasi,
+    Pendaftaran.skor_prestasi,
+    Pendaftaran.nilai_rata,
+    Pendaftaran.jarak_ke_sekolah,
+    Pendaftaran.submitted_at,
+    Pendaftaran.updated_at,
+)
+
+GroupKey = Tuple[str, str, str]  # (tahun_ajaran_id, sekolah_id, jalur_id)
+
+def _timestamp(value) -> float:
+    return value.timestamp() if value is not None else math.inf
+
+def _finite(value: float) -> Optional[float]:
+    return value if math.isfinite(value) else None
+
+def ranking_key(jalur_type: Optional[str], p: Pendaftaran) -> tuple:
+    """
+    Sort key of a registration inside its group, best first. Same order as
+    the batch seleksi: score desc, distance asc, earliest submission (never
+    submitted last), then id so every key is unique.
+    """
+    score = priority_score(jalur_type, p.skor_zonasi, p.skor_prestasi, p.nilai_rata, p.jarak_ke_sekolah)
+    jarak = p.jarak_ke_sekolah if p.jarak_ke_sekolah is not None else math.inf
+    return (-score, jarak, _timestamp(p.submitted_at), p.id)
+
+class RankingGroup:
+    def __init__(self, jalur_type: Optional[str], kuota: int):
+        self.jalur_type = jalur_type
+        self.kuota = kuota
+        self.entries = SortedList()
+        self.keys: Dict[str, tuple] = {}
+        self.loaded_at = time.monotonic()
+        # Newest updated_at seen in the group, where the next refresh starts.
+        self.watermark: Optional[datetime] = None
+
+    def apply(self, p) -> None:
+        """
+        Upsert or remove `p` depending on its status.
+        """
+        if p.status in RANKED_STATUSES:
+            self.upsert(p)
+        else:
+            self.remove(p.id)
+
+    def upsert(self, p) -> None:
+        self.remove(p.id)
+        key = ranking_key(self.jalur_type, p)
+        self.entries.add(key)
+        self.keys[p.id] = key
+
+    def remove(self, pendaftaran_id: str) -> None:
+        key = self.keys.pop(pendaftaran_id, None)
+        if key is not None:
+            self.entries.remove(key)
+
+    def position(self, pendaftaran_id: str) -> Optional[dict]:
+        key = self.keys.get(pendaftaran_id)
+        if key is None:
+            return None
+        rank = self.entries.bisect_left(key) + 1
+        total = len(self.entries)
+        cutoff = None
+        if self.kuota and total >= self.kuota:
+            cutoff = _finite(-self.entries[self.kuota - 1][0])
+        return {
+            "peringkat": rank,
+            "total_pendaftar": total,
+            "kuota": self.kuota,
+            "sisa_kuota": max(self.kuota - total, 0),
+            "skor": _finite(-key[0]),
+            "skor_batas": cutoff,
+            "dalam_kuota": rank <= self.kuota,
+        }
+
+class RankingRegistry:
+    """
+    Live ranking of every (tahun_ajaran, sekolah, jalur) group, loaded lazily
+    from the database and then kept up to date incrementally: this worker's
+    writes are applied as they happen, other workers' by re-reading only the
+    rows updated since the group's watermark once it is older than
+    MAX_GROUP_AGE_SECONDS.
+
+    `_lock` only guards the in-memory groups. Database reads run outside
+    it, under a per-group lock, so loading one group never blocks readers
+    or writers of another.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._groups: Dict[GroupKey, RankingGroup] = {}
+        self._load_locks: Dict[GroupKey, threading.Lock] = {}
+        # Writes of this worker made while their group was being loaded,
+        # applied once it is in (the load may have read before them).
+        self._pending: Dict[GroupKey, List[SimpleNamespace]] = {}
+        # Bumped by reset, so a load that read before it is not kept.
+        self._generation = 0
+
+    def _rows(self, db: Session, key: GroupKey, since: Optional[datetime] = None) -> list:
+        tahun_ajaran_id, sekolah_id, jalur_id = key
+        query = db.query(*RANKING_COLUMNS).filter(
+            Pendaftaran.sekolah_id == sekolah_id,
+            Pendaftaran.jalur_id == jalur_id,
+            Pendaftaran.tahun_ajaran_id == tahun_ajaran_id,
+        )
+        if since is not None:
+            # Bound as text like the pagination cursor (SQLite compares the
+            # stored text), a little early for transactions that committed
+            # after a later one.
+            anchor = since - timedelta(seconds=WATERMARK_SLACK_SECONDS)
+            query = query.filter(Pendaftaran.updated_at >= literal(str(anchor), String))
+        return query.all()
+
+    def _kuota(self, db: Session, key: GroupKey) -> int:
+        tahun_ajaran_id, sekolah_id, jalur_id = key
+        kuota = (
+            db.query(Kuota.kuota)
+            .join(TahunAjaran, TahunAjaran.tahun == Kuota.tahun_ajaran)
+            .filter(
+                TahunAjaran.id == tahun_ajaran_id,
+                Kuota.sekolah_id == sekolah_id,
+                Kuota.jalur_id == jalur_id,
+            )
+            .scalar()
+        )
+        return kuota or 0
+
+    def _load(self, db: Session, key: GroupKey) -> RankingGroup:
+        """
+        Every row of the group (all statuses, so the watermark covers the
+        rows that are not ranked yet) into a new group.
+        """
+        jalur_type = db.query(Jalur.type).filter(Jalur.id == key[2]).scalar()
+        group = RankingGroup(jalur_type, self._kuota(db, key))
+        for row in self._rows(db, key):
+            group.apply(row)
+            group.watermark = _newest(group.watermark, row.updated_at)
+        return group
+
+    def get_group(self, db: Session, key: GroupKey) -> RankingGroup:
+        with self._lock:
+            group = self._groups.get(key)
+            if group is not None and not _is_stale(group):
+                return group
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                group = self._groups.get(key)
+                if group is not None and not _is_stale(group):
+                    # Loaded or refreshed while we waited.
+                    return group
+                self._pending[key] = []
+                generation = self._generation
+            try:
+                if group is None or group.watermark is None:
+                    group, rows = self._load(db, key), ()
+                    kuota = group.kuota
+                else:
+                    kuota = self._kuota(db, key)
+                    rows = self._rows(db, key, since=group.watermark)
+                with self._lock:
+                    group.kuota = kuota
+                    for row in rows:
+                        group.apply(row)
+                        group.watermark = _newest(group.watermark, row.updated_at)
+                    # Our own writes made meanwhile win over what was read.
+                    for p in self._pending[key]:
+                        group.apply(p)
+                    group.loaded_at = time.monotonic()
+                    if self._generation == generation:
+                        self._groups[key] = group
+                return group
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+    def position(self, db: Session, p: Pendaftaran) -> Optional[dict]:
+        group = self.get_group(db, (p.tahun_ajaran_id, p.sekolah_id, p.jalur_id))
+        with self._lock:
+            return group.position(p.id)
+
+    def on_pendaftaran_saved(self, p: Pendaftaran) -> None:
+        """
+        Apply a created or updated pendaftaran to its group, if that group is
+        loaded or being loaded.
+        """
+        key = (p.tahun_ajaran_id, p.sekolah_id, p.jalur_id)
+        snapshot = SimpleNamespace(**{column.key: getattr(p, column.key) for column in RANKING_COLUMNS})
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.append(snapshot)
+            group = self._groups.get(key)
+            if group is not None:
+                group.apply(snapshot)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._groups.clear()
+
+def _is_stale(group: RankingGroup) -> bool:
+    return time.monotonic() - group.loaded_at > MAX_GROUP_AGE_SECONDS
+
+def _newest(a: Optional[datetime], b: Optional[datetime]) -> Optional[datetime]:
+    if a is None or b is None:
+        return a or b
+    return max(a, b)
+
+ranking_registry = RankingRegistry()
@@ -0,0 +1,58 @@
+from typing import List, NamedTuple, Optional
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http_cache import strong_etag
+from app.db.session import AsyncSessionLocal
+from app.models.jalur import Jalur
+from app.models.tahun_ajaran import TahunAjaran
+from app.schemas import registration as schema_reg
+
+JALUR = "jalur"
+TAHUN_AJARAN = "tahun_ajaran"
+TAHUN_AJARAN_ACTIVE = "tahun_ajaran_active"
+
+class Document(NamedTuple):
+    """
+    Serialized response; body (and etag) None when there is nothing to
+    serve (no active tahun ajaran).
+    """
+    body: Optional[bytes]
+    etag: Optional[str]
+
+# Documents above, by name. Cleared on every write of this worker.
+reference_cache = TTLCache("reference", maxsize=8, ttl=settings.REFERENCE_CACHE_TTL_SECONDS)
+
+_jalur_list = TypeAdapter(List[schema_reg.Jalur])
+_tahun_ajaran_list = TypeAdapter(List[schema_reg.TahunAjaran])
+
+async def _load(name: str) -> Document:
+    # Own session, only opened on a miss; the primary, so a reload right
+    # after a write does not read a lagging replica.
+    async with AsyncSessionLocal() as db:
+        if name == JALUR:
+            rows = (await db.scalars(select(Jalur).where(Jalur.is_active == True).order_by(Jalur.order))).all()
+            body = _jalur_list.dump_json(_jalur_list.validate_python(rows, from_attributes=True))
+        elif name == TAHUN_AJARAN:
+            rows = (await db.scalars(select(TahunAjaran))).all()
+            body = _tahun_ajaran_list.dump_json(_tahun_ajaran_list.validate_python(rows, from_attributes=True))
+        else:
+            active = await db.scalar(select(TahunAjaran).where(TahunAjaran.is_active == True).limit(1))
+            if not active:
+                return Document(None, None)
+            body = schema_reg.TahunAjaran.model_validate(active).model_dump_json().encode()
+    return Document(body, strong_etag(body))
+
+async def get_async(name: str) -> Document:
+    """
+    Cached document `name`, loaded once for concurrent misses.
+    """
+    return await reference_cache.get_or_compute_async(name, lambda: _load(name))
+
+def invalidate() -> None:
+    """
+    Call after committing a Jalur or TahunAjaran write.
+    """
+    reference_cache.clear()
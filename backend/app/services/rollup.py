@@ -0,0 +1,197 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.pagination import paginate
+from app.models.pendaftaran import Pendaftaran
+from app.models.rollup import PendaftaranRollup
+from app.models.sekolah import Sekolah
+
+# Bucket width of every granularity kept.
+GRANULARITIES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+# Dimensions a time series can be split by.
+GROUP_BY = {
+    "jalur": PendaftaranRollup.jalur_id,
+    "sekolah": PendaftaranRollup.sekolah_id,
+    "status": PendaftaranRollup.status,
+}
+
+# Pendaftaran read per round trip by `rebuild`.
+REBUILD_CHUNK_SIZE = 5000
+
+# Buckets a time series spans when no start is given, and at most.
+DEFAULT_BUCKETS = 48
+MAX_BUCKETS = 2000
+
+# (granularity, bucket_start, tahun_ajaran_id, dinas_id, sekolah_id, jalur_id, status)
+Key = Tuple[str, datetime, str, str, str, str, str]
+KEY_COLUMNS = ("granularity", "bucket_start", "tahun_ajaran_id", "dinas_id", "sekolah_id", "jalur_id", "status")
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    at = at.replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        at = at.replace(minute=0)
+    if granularity == "day":
+        at = at.replace(hour=0)
+    return at
+
+def _add(deltas: Counter, created_at: datetime, tahun_ajaran_id: str, dinas_id: str, sekolah_id: str, jalur_id: str, status: str, n: int) -> None:
+    for granularity in GRANULARITIES:
+        deltas[granularity, bucket_start(created_at, granularity), tahun_ajaran_id, dinas_id or "", sekolah_id, jalur_id, status or ""] += n
+
+def _upsert(db: Session, deltas: Dict[Key, int]) -> None:
+    """
+    Add `deltas` to the bucket counts with one upsert statement (batched
+    executemany), creating missing buckets. Runs in the caller's transaction.
+    """
+    # In key order, so concurrent upserts lock shared buckets in the same
+    # order and cannot deadlock on each other.
+    rows = [dict(zip(KEY_COLUMNS, key), count=deltas[key]) for key in sorted(deltas) if deltas[key]]
+    if not rows:
+        return
+    table = PendaftaranRollup.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        db.execute(stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted["count"]), rows)
+    elif dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns), set_={"count": table.c.count + stmt.excluded["count"]}
+        )
+        db.execute(stmt, rows)
+    else:
+        for row in rows:
+            key = [getattr(PendaftaranRollup, name) == row[name] for name in KEY_COLUMNS]
+            if not db.execute(update(PendaftaranRollup).where(*key).values(count=PendaftaranRollup.count + row["count"])).rowcount:
+                db.execute(insert(PendaftaranRollup).values(row))
+
+def _dinas_of(db: Session, sekolah_id: str) -> str:
+    return db.scalar(select(Sekolah.dinas_id).where(Sekolah.id == sekolah_id))
+
+def on_pendaftaran_created(db: Session, pendaftaran: Pendaftaran) -> None:
+    """
+    Count a new (flushed, not yet committed) pendaftaran in its buckets.
+    """
+    deltas: Counter = Counter()
+    _add(deltas, pendaftaran.created_at, pendaftaran.tahun_ajaran_id, _dinas_of(db, pendaftaran.sekolah_id),
+         pendaftaran.sekolah_id, pendaftaran.jalur_id, pendaftaran.status, 1)
+    _upsert(db, deltas)
+
+def on_status_changed(db: Session, pendaftaran: Pendaftaran, old_status: str) -> None:
+    """
+    Move a pendaftaran from its `old_status` buckets to its current ones.
+    """
+    if old_status == pendaftaran.status:
+        return
+    deltas: Counter = Counter()
+    key = (pendaftaran.tahun_ajaran_id, _dinas_of(db, pendaftaran.sekolah_id), pendaftaran.sekolah_id, pendaftaran.jalur_id)
+    _add(deltas, pendaftaran.created_at, *key, old_status, -1)
+    _add(deltas, pendaftaran.created_at, *key, pendaftaran.status, 1)
+    _upsert(db, deltas)
+
+def on_statuses_changed(
+    db: Session, tahun_ajaran_id: str, changes: Iterable[Tuple[datetime, str, str, str, str]]
+) -> None:
+    """
+    Move many pendaftaran of a tahun ajaran between buckets at once, each
+    change a (created_at, sekolah_id, jalur_id, old_status, new_status),
+    with one upsert of the summed deltas.
+    """
+    sekolah_dinas = dict(db.execute(select(Sekolah.id, Sekolah.dinas_id)).all())
+    deltas: Counter = Counter()
+    for created_at, sekolah_id, jalur_id, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        key = (tahun_ajaran_id, sekolah_dinas.get(sekolah_id), sekolah_id, jalur_id)
+        _add(deltas, created_at, *key, old_status, -1)
+        _add(deltas, created_at, *key, new_status, 1)
+    _upsert(db, deltas)
+
+def rebuild(db: Session, tahun_ajaran_id: Optional[str] = None) -> int:
+    """
+    Recompute the buckets of one tahun ajaran (or all) from the pendaftaran
+    table in the caller's transaction, REBUILD_CHUNK_SIZE rows at a time
+    so memory stays bounded. Returns the number of rows counted.
+    """
+    clear = delete(PendaftaranRollup)
+    source = select(
+        Pendaftaran.id, Pendaftaran.created_at, Pendaftaran.tahun_ajaran_id, Pendaftaran.sekolah_id,
+        Pendaftaran.jalur_id, Pendaftaran.status,
+    )
+    if tahun_ajaran_id:
+        # The granularities spelled out so the primary key is used.
+        clear = clear.where(
+            PendaftaranRollup.granularity.in_(GRANULARITIES), PendaftaranRollup.tahun_ajaran_id == tahun_ajaran_id
+        )
+        source = source.where(Pendaftaran.tahun_ajaran_id == tahun_ajaran_id)
+    db.execute(clear)
+
+    sekolah_dinas = dict(db.execute(select(Sekolah.id, Sekolah.dinas_id)).all())
+    counted = 0
+    after = None
+    while True:
+        rows = db.execute(paginate(source, Pendaftaran, limit=REBUILD_CHUNK_SIZE, after=after)).all()
+        deltas: Counter = Counter()
+        for _, created_at, ta_id, sekolah_id, jalur_id, status in rows:
+            _add(deltas, created_at, ta_id, sekolah_dinas.get(sekolah_id), sekolah_id, jalur_id, status, 1)
+        # Buckets split across chunks add up, the table was emptied above.
+        _upsert(db, deltas)
+        counted += len(rows)
+        if len(rows) < REBUILD_CHUNK_SIZE:
+            return counted
+        after = (rows[-1].created_at, rows[-1].id)
+
+async def timeseries_async(
+    db: AsyncSession,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    tahun_ajaran_id: Optional[str] = None,
+    dinas_id: Optional[str] = None,
+    sekolah_id: Optional[str] = None,
+    jalur_id: Optional[str] = None,
+    status: Optional[str] = None,
+    group_by: Optional[str] = None,
+) -> Dict[str, List[Tuple[datetime, int]]]:
+    """
+    (bucket_start, count) of the non-empty buckets in [start, end) per
+    `group_by` value, or under "total", read from the rollup only.
+    """
+    columns = [PendaftaranRollup.bucket_start, func.sum(PendaftaranRollup.count)]
+    if group_by:
+        columns.insert(0, GROUP_BY[group_by])
+    query = (
+        select(*columns)
+        .where(
+            PendaftaranRollup.granularity == granularity,
+            PendaftaranRollup.bucket_start >= bucket_start(start, granularity),
+            PendaftaranRollup.bucket_start < end,
+        )
+        .group_by(*columns[:-1])
+        .order_by(PendaftaranRollup.bucket_start)
+    )
+    for column, value in (
+        (PendaftaranRollup.tahun_ajaran_id, tahun_ajaran_id),
+        (PendaftaranRollup.dinas_id, dinas_id),
+        (PendaftaranRollup.sekolah_id, sekolah_id),
+        (PendaftaranRollup.jalur_id, jalur_id),
+        (PendaftaranRollup.status, status),
+    ):
+        if value is not None:
+            query = query.where(column == value)
+    series: Dict[str, List[Tuple[datetime, int]]] = {}
+    for row in await db.execute(query):
+        name, (at, count) = (row[0], row[1:]) if group_by else ("total", row)
+        if count:
+            series.setdefault(name, []).append((at, int(count)))
+    return series
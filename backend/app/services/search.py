@@ -0,0 +1,443 @@
+import itertools
+import logging
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from sortedcontainers import SortedList
+from sqlalchemy import String, literal, select
+from sqlalchemy.orm import Session
+
+from app.crud.scope import scope_siswa
+from app.db.session import ReplicaSessionLocal
+from app.models.pendaftaran import Pendaftaran
+from app.models.sekolah import Sekolah
+from app.models.siswa import Siswa
+
+logger = logging.getLogger(__name__)
+
+# Other workers do not notify us, so pick up their siswa and pendaftaran
+# writes at least this often (by updated_at / created_at watermark).
+REFRESH_SECONDS = 30
+# How far before the watermark a refresh starts reading: timestamps are
+# taken when the statement runs, so a row can commit after a later-stamped
+# one was already read. Re-reading a row is harmless.
+WATERMARK_SLACK_SECONDS = 5
+# Sekolah are few: rebuild them wholesale, like the zonasi index.
+MAX_SEKOLAH_AGE_SECONDS = 300
+# Shorter queries match too much to be useful.
+MIN_QUERY_LENGTH = 2
+LOAD_BATCH_SIZE = 10000
+# Multi-word queries intersect postings as sets, except for words with more
+# than this many times the candidates left: those are checked on the text.
+INTERSECT_FACTOR = 8
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Lowercase ASCII words of `text`, accents folded ("é" -> "e").
+    """
+    if not text:
+        return []
+    folded = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return _WORD.findall(folded)
+
+class TokenIndex:
+    """
+    Prefix index from the words of a text to integer document numbers.
+    Distinct words are kept sorted, so all words starting with a prefix
+    form one range; each word maps to a compact array of documents.
+    """
+
+    def __init__(self):
+        self.words = SortedList()
+        self.postings: Dict[str, array] = {}
+        # Indexed words of every document, None once removed.
+        self.texts: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, doc: int, text: Optional[str]) -> None:
+        """
+        Index `text` as document `doc` (the next number, or an existing
+        document after `remove`).
+        """
+        words = tokenize(text)
+        if doc == len(self.texts):
+            self.texts.append(" ".join(words))
+        else:
+            self.texts[doc] = " ".join(words)
+        for word in dict.fromkeys(words):
+            posting = self.postings.get(word)
+            if posting is None:
+                self.words.add(word)
+                posting = self.postings[word] = array("I")
+            posting.append(doc)
+
+    def remove(self, doc: int) -> None:
+        text = self.texts[doc] if doc < len(self.texts) else None
+        if text is None:
+            return
+        for word in dict.fromkeys(text.split()):
+            posting = self.postings[word]
+            posting.remove(doc)
+            if not posting:
+                del self.postings[word]
+                self.words.remove(word)
+        self.texts[doc] = None
+
+    def _matching_words(self, prefix: str) -> Iterator[str]:
+        # "{" sorts right after "z", the last character a word can hold.
+        return self.words.irange(prefix, prefix + "{", inclusive=(True, False))
+
+    def _matches(self, doc: int, query_words: Sequence[str]) -> bool:
+        words = self.texts[doc].split()
+        return all(any(w.startswith(q) for w in words) for q in query_words)
+
+    def _range(self, prefix: str, cap: Optional[int] = None) -> Tuple[List[str], Optional[int]]:
+        """
+        Words starting with `prefix` and the number of postings under them,
+        or a None size once it exceeds `cap`.
+        """
+        words, size = [], 0
+        for word in self._matching_words(prefix):
+            words.append(word)
+            size += len(self.postings[word])
+            if cap is not None and size > cap:
+                return words, None
+        return words, size
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        accept: Optional[Callable[[int], bool]] = None,
+        within: Optional[Sequence[Sequence[int]]] = None,
+    ) -> List[int]:
+        """
+        Documents with, for every word of `query`, a word starting with it;
+        at most `limit`. `accept` filters candidates (role scoping); `within`
+        optionally lists every acceptable document (in parts), which is
+        walked instead of the postings when it is the smaller set.
+
+        The query word matching the fewest documents drives: alone, its
+        postings are walked with exact word matches first; with other words
+        they are intersected as sets with the postings of the words that
+        are not much broader, and the rest is checked on the stored text.
+        """
+        query_words = list(dict.fromkeys(tokenize(query)))
+        if not query_words:
+            return []
+        # Longest words first: usually the narrowest, so counting the
+        # others stops early.
+        query_words.sort(key=len, reverse=True)
+        drive, drive_words, drive_size = None, [], None
+        for query_word in query_words:
+            words, size = self._range(query_word, cap=drive_size)
+            if size is not None and (drive_size is None or size < drive_size):
+                drive, drive_words, drive_size = query_word, words, size
+
+        if within is not None and sum(map(len, within)) < drive_size:
+            return self._walk(_chain(within), query_words, limit, accept)
+        others = [word for word in query_words if word != drive]
+        if not others:
+            return self._walk(_chain(self.postings[word] for word in drive_words), (), limit, accept)
+
+        candidates = set(_chain(self.postings[word] for word in drive_words))
+        unchecked = []
+        for other in others:
+            words, size = self._range(other, cap=INTERSECT_FACTOR * len(candidates))
+            if size is None:
+                unchecked.append(other)
+            else:
+                candidates.intersection_update(_chain(self.postings[word] for word in words))
+        # Set order is arbitrary: walk it as is, only the hits get sorted.
+        return sorted(self._walk(candidates, unchecked, limit, accept))
+
+    def _walk(self, docs: Iterable[int], query_words: Sequence[str], limit: int, accept) -> List[int]:
+        hits: List[int] = []
+        seen = set()
+        for doc in docs:
+            if doc in seen:
+                continue
+            seen.add(doc)
+            if query_words and not self._matches(doc, query_words):
+                continue
+            if accept is not None and not accept(doc):
+                continue
+            hits.append(doc)
+            if len(hits) >= limit:
+                break
+        return hits
+
+_chain = itertools.chain.from_iterable
+
+def _since(column, watermark):
+    # Bound as text for the same reason as the pagination anchor.
+    anchor = watermark - timedelta(seconds=WATERMARK_SLACK_SECONDS)
+    return column >= literal(str(anchor), String)
+
+class SearchIndex:
+    """
+    Name search over siswa and sekolah. Siswa names are loaded by a
+    background thread started with the app, kept up to date by this
+    worker's writes and refreshed from the other workers' writes every
+    REFRESH_SECONDS by the same thread; sekolah (name and npsn) are rebuilt
+    on change. NISN / NIK lookups use their unique indexes instead.
+
+    `_lock` guards the in-memory structures and is only held to apply one
+    batch of rows, so searches are never queued behind a load;
+    `_refresh_lock` keeps one siswa refresh and `_sekolah_lock` one sekolah
+    rebuild at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._sekolah_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._clear()
+
+    def _clear(self) -> None:
+        self._siswa = TokenIndex()
+        self._siswa_ids: List[str] = []
+        self._siswa_docs: Dict[str, int] = {}
+        # Sekolah ids the siswa registered at and the reverse, for role scoping.
+        self._siswa_sekolah: List[Tuple[str, ...]] = []
+        self._sekolah_members: Dict[str, array] = {}
+        # Pendaftaran seen before their siswa (written between the two
+        # refresh queries), applied once the siswa is added.
+        self._pending_sekolah: Dict[str, Tuple[str, ...]] = {}
+        self._siswa_loaded = False
+        self._siswa_watermark = None
+        self._pendaftaran_watermark = None
+
+        self._sekolah = TokenIndex()
+        self._sekolah_rows: List[dict] = []
+        self._sekolah_dinas: Dict[str, str] = {}
+        self._sekolah_dirty = True
+        self._sekolah_built_at = 0.0
+
+    # -- loading ---------------------------------------------------------
+
+    def add_siswa(self, siswa_id: str, nama_lengkap: str) -> None:
+        doc = self._siswa_docs.get(siswa_id)
+        if doc is None:
+            doc = len(self._siswa_ids)
+            self._siswa_ids.append(siswa_id)
+            self._siswa_sekolah.append(())
+            self._siswa_docs[siswa_id] = doc
+            for sekolah_id in self._pending_sekolah.pop(siswa_id, ()):
+                self.add_pendaftaran(siswa_id, sekolah_id)
+        else:
+            self._siswa.remove(doc)
+        self._siswa.add(doc, nama_lengkap)
+
+    def add_pendaftaran(self, siswa_id: str, sekolah_id: str) -> None:
+        doc = self._siswa_docs.get(siswa_id)
+        if doc is None:
+            pending = self._pending_sekolah.get(siswa_id, ())
+            if sekolah_id not in pending:
+                self._pending_sekolah[siswa_id] = pending + (sekolah_id,)
+        elif sekolah_id not in self._siswa_sekolah[doc]:
+            self._siswa_sekolah[doc] += (sekolah_id,)
+            self._sekolah_members.setdefault(sekolah_id, array("I")).append(doc)
+
+    def set_sekolah(self, rows: List[dict]) -> None:
+        index = TokenIndex()
+        for doc, row in enumerate(rows):
+            index.add(doc, f"{row['name']} {row['npsn']}")
+        sekolah_dinas = {row["id"]: row["dinas_id"] for row in rows}
+        with self._lock:
+            self._sekolah = index
+            self._sekolah_rows = rows
+            self._sekolah_dinas = sekolah_dinas
+            self._sekolah_built_at = time.monotonic()
+
+    def _load_siswa_since(self, db: Session) -> None:
+        """
+        Siswa and pendaftaran written since the watermarks, less
+        WATERMARK_SLACK_SECONDS (everything on the first run). Rows are read outside `_lock` and applied one
+        LOAD_BATCH_SIZE batch at a time.
+        """
+        query = select(Siswa.id, Siswa.nama_lengkap, Siswa.updated_at)
+        if self._siswa_watermark is not None:
+            query = query.where(_since(Siswa.updated_at, self._siswa_watermark))
+        for rows in db.execute(query.execution_options(yield_per=LOAD_BATCH_SIZE)).partitions():
+            with self._lock:
+                for siswa_id, nama_lengkap, updated_at in rows:
+                    self.add_siswa(siswa_id, nama_lengkap)
+                    if updated_at is not None and (self._siswa_watermark is None or updated_at > self._siswa_watermark):
+                        self._siswa_watermark = updated_at
+
+        query = select(Pendaftaran.siswa_id, Pendaftaran.sekolah_id, Pendaftaran.created_at)
+        if self._pendaftaran_watermark is not None:
+            query = query.where(_since(Pendaftaran.created_at, self._pendaftaran_watermark))
+        for rows in db.execute(query.execution_options(yield_per=LOAD_BATCH_SIZE)).partitions():
+            with self._lock:
+                for siswa_id, sekolah_id, created_at in rows:
+                    self.add_pendaftaran(siswa_id, sekolah_id)
+                    if created_at is not None and (self._pendaftaran_watermark is None or created_at > self._pendaftaran_watermark):
+                        self._pendaftaran_watermark = created_at
+        with self._lock:
+            self._siswa_loaded = True
+
+    def _load_sekolah(self, db: Session) -> None:
+        # Cleared first, so an invalidation during the load is kept.
+        self._sekolah_dirty = False
+        rows = db.execute(select(Sekolah.id, Sekolah.dinas_id, Sekolah.npsn, Sekolah.name, Sekolah.jenjang)).all()
+        self.set_sekolah([row._asdict() for row in rows])
+
+    def _sekolah_stale(self) -> bool:
+        return self._sekolah_dirty or time.monotonic() - self._sekolah_built_at > MAX_SEKOLAH_AGE_SECONDS
+
+    @property
+    def siswa_ready(self) -> bool:
+        return self._siswa_loaded
+
+    def ensure_sekolah_fresh(self, db: Session) -> None:
+        """
+        Rebuild the sekolah index when changed or old; sekolah are few, so
+        this stays on the request path and a sekolah write shows at once.
+        """
+        if not self._sekolah_stale():
+            return
+        with self._sekolah_lock:
+            if self._sekolah_stale():
+                self._load_sekolah(db)
+
+    def refresh(self, db: Session) -> None:
+        """
+        Load (first run) or catch up the siswa names, and the sekolah if stale.
+        """
+        self.ensure_sekolah_fresh(db)
+        with self._refresh_lock:
+            self._load_siswa_since(db)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                # Bulk reads, kept off the primary when there is a replica.
+                with ReplicaSessionLocal() as db:
+                    self.refresh(db)
+            except Exception:
+                logger.exception("search index refresh failed")
+            if self._stop.wait(REFRESH_SECONDS):
+                return
+
+    def start(self) -> None:
+        """
+        Load the index in the background now and refresh it every
+        REFRESH_SECONDS; until the first load is done, `search` scans.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="search-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def mark_loaded(self) -> None:
+        """
+        Treat what was added by hand as the full data set (benchmarks).
+        """
+        self._siswa_loaded = True
+        self._sekolah_dirty = False
+        self._sekolah_built_at = float("inf")
+
+    # -- writes of this worker ------------------------------------------
+
+    def on_siswa_saved(self, siswa: Siswa) -> None:
+        with self._lock:
+            if self._siswa_loaded:
+                self.add_siswa(siswa.id, siswa.nama_lengkap)
+
+    def on_pendaftaran_saved(self, p: Pendaftaran) -> None:
+        with self._lock:
+            if self._siswa_loaded:
+                self.add_pendaftaran(p.siswa_id, p.sekolah_id)
+
+    def invalidate_sekolah(self) -> None:
+        self._sekolah_dirty = True
+
+    def reset(self) -> None:
+        with self._refresh_lock, self._sekolah_lock, self._lock:
+            self._clear()
+
+    # -- queries ---------------------------------------------------------
+
+    def search_siswa_ids(self, q: str, limit: int, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None) -> List[str]:
+        # Scope built under the lock: a refresh in another thread adds
+        # sekolah members while we would be iterating them.
+        with self._lock:
+            accept = within = None
+            if sekolah_id:
+                accept = lambda doc: sekolah_id in self._siswa_sekolah[doc]
+                within = [self._sekolah_members.get(sekolah_id, ())]
+            elif dinas_id:
+                accept = lambda doc: any(self._sekolah_dinas.get(s) == dinas_id for s in self._siswa_sekolah[doc])
+                within = [
+                    members for s, members in self._sekolah_members.items() if self._sekolah_dinas.get(s) == dinas_id
+                ]
+            docs = self._siswa.search(q, limit, accept, within)
+            return [self._siswa_ids[doc] for doc in docs]
+
+    def search_sekolah(self, q: str, limit: int, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None) -> List[dict]:
+        accept = None
+        if sekolah_id:
+            accept = lambda doc: self._sekolah_rows[doc]["id"] == sekolah_id
+        elif dinas_id:
+            accept = lambda doc: self._sekolah_rows[doc]["dinas_id"] == dinas_id
+        with self._lock:
+            return [self._sekolah_rows[doc] for doc in self._sekolah.search(q, limit, accept)]
+
+search_index = SearchIndex()
+
+def _siswa_by_number(db: Session, q: str, limit: int, dinas_id: Optional[str], sekolah_id: Optional[str]) -> List[Siswa]:
+    # Prefix as a range on the unique nisn / nik indexes; ":" sorts right after "9".
+    found: Dict[str, Siswa] = {}
+    for column in (Siswa.nisn, Siswa.nik):
+        query = select(Siswa).where(column >= q, column < q + ":")
+        query = scope_siswa(query, dinas_id, sekolah_id).order_by(column).limit(limit)
+        for siswa in db.scalars(query):
+            found.setdefault(siswa.id, siswa)
+    return list(found.values())[:limit]
+
+def _siswa_by_name(db: Session, q: str, limit: int, dinas_id: Optional[str], sekolah_id: Optional[str]) -> List[Siswa]:
+    # Every query word anywhere in the name: a superset of the index's
+    # word-prefix match, read with a scan of siswa.
+    query = select(Siswa)
+    for word in dict.fromkeys(tokenize(q)):
+        query = query.where(Siswa.nama_lengkap.ilike(f"%{word}%"))
+    return list(db.scalars(scope_siswa(query, dinas_id, sekolah_id).limit(limit)))
+
+def search(db: Session, q: str, limit: int = 20, include_siswa: bool = True, dinas_id: Optional[str] = None, sekolah_id: Optional[str] = None) -> dict:
+    """
+    Siswa (by nama_lengkap, or nisn / nik for a number) and sekolah (by
+    name or npsn) matching `q`, limited to a dinas or a sekolah when given.
+    """
+    q = q.strip()
+    if len(q) < MIN_QUERY_LENGTH:
+        return {"siswa": [], "sekolah": []}
+    search_index.ensure_sekolah_fresh(db)
+    sekolah = search_index.search_sekolah(q, limit, dinas_id=dinas_id, sekolah_id=sekolah_id)
+    if not include_siswa:
+        return {"siswa": [], "sekolah": sekolah}
+    if q.isdigit():
+        return {"siswa": _siswa_by_number(db, q, limit, dinas_id, sekolah_id), "sekolah": sekolah}
+
+    if not search_index.siswa_ready:
+        # First load still running in the background: scan rather than wait.
+        return {"siswa": _siswa_by_name(db, q, limit, dinas_id, sekolah_id), "sekolah": sekolah}
+    ids = search_index.search_siswa_ids(q, limit, dinas_id=dinas_id, sekolah_id=sekolah_id)
+    rows = {s.id: s for s in db.scalars(select(Siswa).where(Siswa.id.in_(ids)))} if ids else {}
+    # Siswa deleted by another worker are still indexed, drop them here.
+    return {"siswa": [rows[i] for i in ids if i in rows], "sekolah": sekolah}
@@ -0,0 +1,293 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.pendaftaran import Pendaftaran
+from app.models.kuota import Kuota
+from app.models.jalur import Jalur
+from app.models.tahun_ajaran import TahunAjaran
+from app.schemas import registration as schema_reg
+from app.services import rollup
+
+# Registrations that take part in the selection (everything past draft that
+# has not been rejected during verification).
+ELIGIBLE_STATUSES = ("submitted", "verifikasi", "verified")
+
+STATUS_DITERIMA = "diterima"
+STATUS_TIDAK_DITERIMA = "tidak_diterima"
+
+# Rows per bulk UPDATE statement, keeps the IN (...) list well below driver limits.
+UPDATE_CHUNK_SIZE = 1000
+
+def priority_score(
+    jalur_type: Optional[str],
+    skor_zonasi: Optional[float],
+    skor_prestasi: Optional[float],
+    nilai_rata: Optional[float],
+    jarak_ke_sekolah: Optional[float],
+) -> float:
+    """
+    Primary ranking score of a single registration, higher is better.
+    Mirrors `priority_scores` for code that ranks one row at a time.
+    """
+    if jalur_type == "zonasi":
+        if skor_zonasi is not None:
+            return float(skor_zonasi)
+        if jarak_ke_sekolah is not None:
+            return -float(jarak_ke_sekolah)
+    elif jalur_type == "prestasi":
+        if skor_prestasi is not None:
+            return float(skor_prestasi)
+    if nilai_rata is not None:
+        return float(nilai_rata)
+    return float("-inf")
+
+def priority_scores(
+    jalur_types: np.ndarray,
+    skor_zonasi: np.ndarray,
+    skor_prestasi: np.ndarray,
+    nilai_rata: np.ndarray,
+    jarak_ke_sekolah: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized `priority_score`. Missing values are NaN in the inputs.
+    """
+    zonasi = np.where(np.isnan(skor_zonasi), -jarak_ke_sekolah, skor_zonasi)
+    fallback = nilai_rata
+    score = np.where(
+        jalur_types == "zonasi",
+        np.where(np.isnan(zonasi), fallback, zonasi),
+        np.where(
+            (jalur_types == "prestasi") & ~np.isnan(skor_prestasi),
+            skor_prestasi,
+            fallback,
+        ),
+    )
+    return np.where(np.isnan(score), -np.inf, score)
+
+def load_registrations(db: Session, tahun_ajaran_id: str) -> Optional[dict]:
+    """
+    Eligible pendaftaran of a tahun ajaran as column arrays, or None if there are none.
+    """
+    rows = (
+        db.query(
+            Pendaftaran.id,
+            Pendaftaran.siswa_id,
+            Pendaftaran.sekolah_id,
+            Pendaftaran.jalur_id,
+            Pendaftaran.skor_zonasi,
+            Pendaftaran.skor_prestasi,
+            Pendaftaran.nilai_rata,
+            Pendaftaran.jarak_ke_sekolah,
+            Pendaftaran.submitted_at,
+            Pendaftaran.created_at,
+            Pendaftaran.status,
+        )
+        .filter(
+            Pendaftaran.tahun_ajaran_id == tahun_ajaran_id,
+            Pendaftaran.status.in_(ELIGIBLE_STATUSES),
+        )
+        .all()
+    )
+    if not rows:
+        return None
+    ids, siswa_ids, sekolah_ids, jalur_ids, zonasi, prestasi, nilai, jarak, submitted, created, statuses = zip(*rows)
+    return {
+        "id": np.array(ids, dtype=object),
+        "siswa_id": np.array(siswa_ids, dtype=object),
+        "sekolah_id": np.array(sekolah_ids, dtype=object),
+        "jalur_id": np.array(jalur_ids, dtype=object),
+        "skor_zonasi": np.array(zonasi, dtype=np.float64),
+        "skor_prestasi": np.array(prestasi, dtype=np.float64),
+        "nilai_rata": np.array(nilai, dtype=np.float64),
+        "jarak_ke_sekolah": np.array(jarak, dtype=np.float64),
+        "submitted_at": _timestamps(submitted),
+        "created_at": _timestamps(created),
+        # As loaded, for moving the rollup buckets once statuses change.
+        "created": np.array(created, dtype=object),
+        "status": np.array(statuses, dtype=object),
+    }
+
+def _timestamps(values) -> np.ndarray:
+    return np.array([v.timestamp() if v is not None else np.inf for v in values], dtype=np.float64)
+
+def load_kuota(db: Session, tahun: str) -> Dict[Tuple[str, str], Tuple[str, int]]:
+    """
+    Kuota rows of a tahun ajaran as {(sekolah_id, jalur_id): (kuota_id, kuota)}.
+    """
+    rows = db.query(Kuota.id, Kuota.sekolah_id, Kuota.jalur_id, Kuota.kuota).filter(
+        Kuota.tahun_ajaran == tahun
+    ).all()
+    return {(sekolah_id, jalur_id): (kuota_id, kuota) for kuota_id, sekolah_id, jalur_id, kuota in rows}
+
+def load_accepted(db: Session, tahun_ajaran_id: str) -> Dict[Tuple[str, str], int]:
+    """
+    Pendaftaran of a tahun ajaran already diterima (by an earlier run) as
+    {(sekolah_id, jalur_id): count}.
+    """
+    # Counted here rather than with GROUP BY, which SQLite would answer by
+    # walking the (sekolah_id, jalur_id) index instead of (tahun, status).
+    # At most the total Kuota of the year comes back.
+    rows = db.query(Pendaftaran.sekolah_id, Pendaftaran.jalur_id).filter(
+        Pendaftaran.tahun_ajaran_id == tahun_ajaran_id, Pendaftaran.status == STATUS_DITERIMA
+    )
+    return dict(Counter(tuple(row) for row in rows))
+
+def remaining_capacity(
+    group_keys: List[Tuple[str, str]],
+    kuota_by_pair: Dict[Tuple[str, str], Tuple[str, int]],
+    accepted_before: Dict[Tuple[str, str], int],
+) -> np.ndarray:
+    """
+    Seats per group still open: its Kuota minus the pendaftaran already diterima.
+    """
+    return np.array(
+        [max(kuota_by_pair.get(key, (None, 0))[1] - accepted_before.get(key, 0), 0) for key in group_keys],
+        dtype=np.int64,
+    )
+
+def rank_groups(cols: dict, jalur_type_by_id: Dict[str, str]):
+    """
+    Rank registrations inside their (sekolah_id, jalur_id) group in one pass.
+
+    Returns (codes, rank, group_keys), `codes` and `rank` aligned with the
+    rows of `cols`: `codes[i]` is the group of row i, `rank[i]` its 0-based
+    position in that group (best first) and `group_keys[code]` the
+    (sekolah_id, jalur_id) pair of a group.
+    """
+    pair_index: Dict[Tuple[str, str], int] = {}
+    codes = np.fromiter(
+        (
+            pair_index.setdefault(pair, len(pair_index))
+            for pair in zip(cols["sekolah_id"].tolist(), cols["jalur_id"].tolist())
+        ),
+        dtype=np.int64,
+        count=len(cols["id"]),
+    )
+    group_keys = list(pair_index)
+
+    jalur_types = np.array(
+        [jalur_type_by_id.get(j) or "" for j in cols["jalur_id"]], dtype=object
+    )
+    score = priority_scores(
+        jalur_types,
+        cols["skor_zonasi"],
+        cols["skor_prestasi"],
+        cols["nilai_rata"],
+        cols["jarak_ke_sekolah"],
+    )
+    jarak = np.where(np.isnan(cols["jarak_ke_sekolah"]), np.inf, cols["jarak_ke_sekolah"])
+
+    # lexsort uses the last key as the primary one: group, score desc,
+    # distance asc, earliest submission first.
+    order = np.lexsort((cols["submitted_at"], jarak, -score, codes))
+    sorted_codes = codes[order]
+    group_start = np.searchsorted(sorted_codes, np.arange(len(group_keys)))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - group_start[sorted_codes]
+    return codes, rank, group_keys
+
+def _bulk_set_status(db: Session, ids: List[str], status: str) -> None:
+    for start in range(0, len(ids), UPDATE_CHUNK_SIZE):
+        chunk = ids[start:start + UPDATE_CHUNK_SIZE]
+        db.execute(
+            update(Pendaftaran)
+            .where(Pendaftaran.id.in_(chunk))
+            .values(status=status)
+            .execution_options(synchronize_session=False)
+        )
+
+def empty_result(tahun_ajaran_id: str, dry_run: bool) -> schema_reg.SeleksiResult:
+    return schema_reg.SeleksiResult(
+        tahun_ajaran_id=tahun_ajaran_id, dry_run=dry_run,
+        total=0, diterima=0, tidak_diterima=0, groups=[],
+    )
+
+def apply_result(
+    db: Session,
+    tahun_ajaran_id: str,
+    cols: dict,
+    codes: np.ndarray,
+    group_keys: List[Tuple[str, str]],
+    capacity: np.ndarray,
+    kuota_by_pair: Dict[Tuple[str, str], Tuple[str, int]],
+    accepted_before: Dict[Tuple[str, str], int],
+    accepted: np.ndarray,
+    dry_run: bool,
+) -> schema_reg.SeleksiResult:
+    """
+    Summarize a per-row `accepted` mask and, unless `dry_run`, write the
+    statuses and Kuota.terisi (`accepted_before` plus this run) back in bulk.
+    Group `kuota` is the capacity this run had.
+    """
+    accepted_ids = cols["id"][accepted].tolist()
+    rejected_ids = cols["id"][~accepted].tolist()
+
+    applicants = np.bincount(codes, minlength=len(group_keys))
+    filled = np.bincount(codes[accepted], minlength=len(group_keys))
+    groups = [
+        schema_reg.SeleksiGroup(
+            sekolah_id=sekolah_id,
+            jalur_id=jalur_id,
+            kuota=int(capacity[code]),
+            pendaftar=int(applicants[code]),
+            diterima=int(filled[code]),
+        )
+        for code, (sekolah_id, jalur_id) in enumerate(group_keys)
+    ]
+
+    if not dry_run:
+        _bulk_set_status(db, accepted_ids, STATUS_DITERIMA)
+        _bulk_set_status(db, rejected_ids, STATUS_TIDAK_DITERIMA)
+        kuota_updates = [
+            {"id": kuota_by_pair[key][0], "terisi": accepted_before.get(key, 0) + int(filled[code])}
+            for code, key in enumerate(group_keys)
+            if key in kuota_by_pair
+        ]
+        if kuota_updates:
+            db.execute(update(Kuota), kuota_updates)
+        # The bulk status change moves rows between rollup buckets.
+        new_statuses = np.where(accepted, STATUS_DITERIMA, STATUS_TIDAK_DITERIMA)
+        rollup.on_statuses_changed(
+            db,
+            tahun_ajaran_id,
+            zip(cols["created"].tolist(), cols["sekolah_id"].tolist(), cols["jalur_id"].tolist(),
+                cols["status"].tolist(), new_statuses.tolist()),
+        )
+        db.commit()
+
+    return schema_reg.SeleksiResult(
+        tahun_ajaran_id=tahun_ajaran_id,
+        dry_run=dry_run,
+        total=len(accepted),
+        diterima=len(accepted_ids),
+        tidak_diterima=len(rejected_ids),
+        groups=groups,
+    )
+
+def run_seleksi(db: Session, tahun_ajaran_id: str, dry_run: bool = False) -> Optional[schema_reg.SeleksiResult]:
+    """
+    Rank every eligible pendaftaran of a tahun ajaran against its Kuota and
+    mark it diterima/tidak_diterima. With `dry_run` nothing is written.
+    Returns None when the tahun ajaran does not exist.
+    """
+    tahun_ajaran = db.query(TahunAjaran).filter(TahunAjaran.id == tahun_ajaran_id).first()
+    if not tahun_ajaran:
+        return None
+
+    cols = load_registrations(db, tahun_ajaran_id)
+    if cols is None:
+        return empty_result(tahun_ajaran_id, dry_run)
+
+    jalur_type_by_id = dict(db.query(Jalur.id, Jalur.type).all())
+    kuota_by_pair = load_kuota(db, tahun_ajaran.tahun)
+    accepted_before = load_accepted(db, tahun_ajaran_id)
+
+    codes, rank, group_keys = rank_groups(cols, jalur_type_by_id)
+    capacity = remaining_capacity(group_keys, kuota_by_pair, accepted_before)
+    accepted = rank < capacity[codes]
+    return apply_result(
+        db, tahun_ajaran_id, cols, codes, group_keys, capacity, kuota_by_pair, accepted_before, accepted, dry_run
+    )
@@ -0,0 +1,257 @@
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import ReplicaSessionLocal
+from app.models.dinas import Dinas
+from app.models.pendaftaran import Pendaftaran
+from app.models.sekolah import Sekolah
+from app.models.siswa import Siswa
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Counter keys: (name, scope id). Totals use None as the scope id.
+USERS = "users"
+ROLE = "role"  # scope id is the role
+DINAS = "dinas"
+SEKOLAH = "sekolah"  # scope id None or a dinas id
+SISWA = "siswa"  # scope id None, a dinas id or a sekolah id
+PENDAFTARAN = "pendaftaran"  # scope id a dinas id or a sekolah id
+
+def count_all(db: Session) -> Counter:
+    """
+    Every counter recounted from the database, in six grouped queries.
+    """
+    counts: Counter = Counter()
+    for role, n in db.execute(select(User.role, func.count(User.id)).group_by(User.role)):
+        counts[USERS, None] += n
+        counts[ROLE, role.value if isinstance(role, UserRole) else role] = n
+    counts[DINAS, None] = db.scalar(select(func.count(Dinas.id)))
+    counts[SISWA, None] = db.scalar(select(func.count(Siswa.id)))
+    for dinas_id, n in db.execute(select(Sekolah.dinas_id, func.count(Sekolah.id)).group_by(Sekolah.dinas_id)):
+        counts[SEKOLAH, None] += n
+        counts[SEKOLAH, dinas_id] = n
+    per_sekolah = (
+        select(Sekolah.dinas_id, Pendaftaran.sekolah_id, func.count(Pendaftaran.id), func.count(distinct(Pendaftaran.siswa_id)))
+        .join(Sekolah, Pendaftaran.sekolah_id == Sekolah.id)
+        .group_by(Sekolah.dinas_id, Pendaftaran.sekolah_id)
+    )
+    for dinas_id, sekolah_id, n, n_siswa in db.execute(per_sekolah):
+        counts[PENDAFTARAN, sekolah_id] = n
+        counts[PENDAFTARAN, dinas_id] += n
+        counts[SISWA, sekolah_id] = n_siswa
+    # A siswa registered at several sekolah of one dinas counts once there.
+    per_dinas = (
+        select(Sekolah.dinas_id, func.count(distinct(Pendaftaran.siswa_id)))
+        .join(Sekolah, Pendaftaran.sekolah_id == Sekolah.id)
+        .group_by(Sekolah.dinas_id)
+    )
+    for dinas_id, n_siswa in db.execute(per_dinas):
+        counts[SISWA, dinas_id] = n_siswa
+    return counts
+
+class StatsCounters:
+    """
+    Totals behind the stats summary, per role, dinas and sekolah. Counted
+    once, then kept up to date by this worker's writes and recounted every
+    STATS_RECONCILE_SECONDS in a background thread, which fixes any drift
+    and picks up the writes of other workers. Reads never query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held while counting, so concurrent callers wait for one count.
+        self._reconcile_lock = threading.Lock()
+        self._counts: Optional[Counter] = None
+        self._sekolah_dinas: Dict[str, str] = {}
+        self._stale = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- reconciliation --------------------------------------------------
+
+    def reconcile(self, db: Optional[Session] = None) -> None:
+        """
+        Replace the counters with a fresh count. Writes of this worker
+        committed while counting may be missed or counted twice until the
+        next run.
+        """
+        if db is None:
+            # Grouped scans, kept off the primary when there is a replica.
+            with ReplicaSessionLocal() as db:
+                return self.reconcile(db)
+        counts = count_all(db)
+        sekolah_dinas = dict(db.execute(select(Sekolah.id, Sekolah.dinas_id)).all())
+        with self._lock:
+            if self._counts is not None:
+                drifted = [key for key in counts.keys() | self._counts.keys() if counts[key] != self._counts[key]]
+                if drifted:
+                    logger.info("stats counters reconciled, %d drifted (e.g. %s)", len(drifted), drifted[:5])
+            self._counts = counts
+            self._sekolah_dinas = sekolah_dinas
+            self._stale = False
+
+    @property
+    def ready(self) -> bool:
+        return self._counts is not None and not self._stale
+
+    def ensure_loaded(self) -> None:
+        """
+        Count now when never counted or invalidated; blocks, call from a
+        worker thread.
+        """
+        if self.ready:
+            return
+        with self._reconcile_lock:
+            if self._counts is None or self._stale:
+                self.reconcile()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                with self._reconcile_lock:
+                    self.reconcile()
+            except Exception:
+                logger.exception("stats counter reconciliation failed")
+            if self._stop.wait(settings.STATS_RECONCILE_SECONDS):
+                return
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stats-reconcile", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def invalidate(self) -> None:
+        """
+        For changes that cannot be applied as deltas: the next read recounts.
+        """
+        with self._lock:
+            self._stale = True
+
+    # -- reads -----------------------------------------------------------
+
+    def super_admin_summary(self) -> dict:
+        with self._lock:
+            counts = self._counts or Counter()
+            return {
+                "total_users": counts[USERS, None],
+                "total_dinas": counts[DINAS, None],
+                "total_sekolah": counts[SEKOLAH, None],
+                "total_siswa": counts[SISWA, None],
+                "roles": {
+                    role.value: counts[ROLE, role.value]
+                    for role in (UserRole.super_admin, UserRole.admin_dinas, UserRole.admin_sekolah)
+                },
+            }
+
+    def dinas_summary(self, dinas_id: str) -> dict:
+        with self._lock:
+            counts = self._counts or Counter()
+            return {
+                "total_sekolah": counts[SEKOLAH, dinas_id],
+                "total_siswa": counts[SISWA, dinas_id],
+                "total_pendaftaran": counts[PENDAFTARAN, dinas_id],
+            }
+
+    def sekolah_summary(self, sekolah_id: str) -> dict:
+        with self._lock:
+            counts = self._counts or Counter()
+            return {
+                "total_siswa": counts[SISWA, sekolah_id],
+                "total_pendaftaran": counts[PENDAFTARAN, sekolah_id],
+            }
+
+    # -- writes of this worker ------------------------------------------
+
+    def _apply(self, *deltas) -> None:
+        with self._lock:
+            if self._counts is None:
+                return
+            for key, delta in deltas:
+                self._counts[key] += delta
+
+    def on_user_created(self, user: User) -> None:
+        self._apply(((USERS, None), 1), ((ROLE, _role(user.role)), 1))
+
+    def on_user_deleted(self, user: User) -> None:
+        self._apply(((USERS, None), -1), ((ROLE, _role(user.role)), -1))
+
+    def on_user_role_changed(self, old_role, new_role) -> None:
+        if _role(old_role) != _role(new_role):
+            self._apply(((ROLE, _role(old_role)), -1), ((ROLE, _role(new_role)), 1))
+
+    def on_dinas_created(self) -> None:
+        self._apply(((DINAS, None), 1))
+
+    def on_dinas_deleted(self) -> None:
+        self._apply(((DINAS, None), -1))
+
+    def on_sekolah_created(self, sekolah: Sekolah) -> None:
+        with self._lock:
+            if self._counts is None:
+                return
+            self._sekolah_dinas[sekolah.id] = sekolah.dinas_id
+            self._counts[SEKOLAH, None] += 1
+            self._counts[SEKOLAH, sekolah.dinas_id] += 1
+
+    def on_sekolah_updated(self, sekolah: Sekolah) -> None:
+        with self._lock:
+            moved = self._counts is not None and self._sekolah_dinas.get(sekolah.id) != sekolah.dinas_id
+        if moved:
+            # Its pendaftaran and siswa move to another dinas as well.
+            self.invalidate()
+
+    def on_sekolah_deleted(self, sekolah: Sekolah) -> None:
+        with self._lock:
+            if self._counts is None:
+                return
+            self._sekolah_dinas.pop(sekolah.id, None)
+            self._counts[SEKOLAH, None] -= 1
+            self._counts[SEKOLAH, sekolah.dinas_id] -= 1
+
+    def on_siswa_created(self) -> None:
+        self._apply(((SISWA, None), 1))
+
+    def on_pendaftaran_created(self, db: Session, pendaftaran: Pendaftaran) -> None:
+        """
+        Runs one indexed query for the siswa's other registrations, to know
+        whether the siswa is new to this sekolah and dinas.
+        """
+        with self._lock:
+            if self._counts is None:
+                return
+        others = {
+            sekolah_id for sekolah_id, in db.execute(
+                select(Pendaftaran.sekolah_id).where(Pendaftaran.siswa_id == pendaftaran.siswa_id, Pendaftaran.id != pendaftaran.id)
+            )
+        }
+        with self._lock:
+            if self._counts is None:
+                return
+            sekolah_id = pendaftaran.sekolah_id
+            dinas_id = self._sekolah_dinas.get(sekolah_id)
+            if dinas_id is None or any(other not in self._sekolah_dinas for other in others):
+                # Sekolah created by another worker since the last count.
+                self._stale = True
+                return
+            self._counts[PENDAFTARAN, sekolah_id] += 1
+            self._counts[PENDAFTARAN, dinas_id] += 1
+            if sekolah_id not in others:
+                self._counts[SISWA, sekolah_id] += 1
+            if dinas_id not in {self._sekolah_dinas[other] for other in others}:
+                self._counts[SISWA, dinas_id] += 1
+
+def _role(role) -> str:
+    return role.value if isinstance(role, UserRole) else role
+
+stats_counters = StatsCounters()
@@ -0,0 +1,157 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.sekolah import Sekolah
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEG_LAT = 111320.0
+
+# Grid cell size in degrees (~5.5 km at the equator).
+CELL_DEG = 0.05
+
+# Other workers do not see our invalidations, so rebuild at least this often.
+MAX_INDEX_AGE_SECONDS = 300
+
+def haversine_m(lat: float, lng: float, lats_rad: np.ndarray, lngs_rad: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distance in meters from one point (degrees) to many points (radians).
+    """
+    lat_rad = math.radians(lat)
+    lng_rad = math.radians(lng)
+    dlat = lats_rad - lat_rad
+    dlng = lngs_rad - lng_rad
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def _cell(lat: float, lng: float) -> Tuple[int, int]:
+    return (math.floor(lat / CELL_DEG), math.floor(lng / CELL_DEG))
+
+class _Snapshot(NamedTuple):
+    rows: List[dict]
+    lats_rad: np.ndarray
+    lngs_rad: np.ndarray
+    cells: Dict[Tuple[int, int], np.ndarray]
+    built_at: float
+
+_EMPTY = _Snapshot([], np.empty(0), np.empty(0), {}, 0.0)
+
+class SekolahSpatialIndex:
+    """
+    In-memory grid index over the coordinates of every Sekolah.
+    Schools without lat/lng are left out.
+
+    A build publishes one immutable snapshot with a single assignment;
+    readers take one reference to it, so a query overlapping a rebuild
+    sees either the old index or the new one, never a mix.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._snapshot = _EMPTY
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def _needs_rebuild(self) -> bool:
+        return self._dirty or time.monotonic() - self._snapshot.built_at > MAX_INDEX_AGE_SECONDS
+
+    def build(self, db: Session) -> None:
+        # Cleared first, so an invalidation during the build is kept.
+        self._dirty = False
+        rows = (
+            db.query(
+                Sekolah.id, Sekolah.npsn, Sekolah.name, Sekolah.jenjang,
+                Sekolah.alamat, Sekolah.lat, Sekolah.lng,
+            )
+            .filter(Sekolah.lat.isnot(None), Sekolah.lng.isnot(None))
+            .all()
+        )
+        records = [row._asdict() for row in rows]
+        lats = np.array([r["lat"] for r in records], dtype=np.float64)
+        lngs = np.array([r["lng"] for r in records], dtype=np.float64)
+
+        buckets = defaultdict(list)
+        for i, r in enumerate(records):
+            buckets[_cell(r["lat"], r["lng"])].append(i)
+
+        self._snapshot = _Snapshot(
+            rows=records,
+            lats_rad=np.radians(lats),
+            lngs_rad=np.radians(lngs),
+            cells={key: np.array(idx, dtype=np.int64) for key, idx in buckets.items()},
+            built_at=time.monotonic(),
+        )
+
+    def ensure_built(self, db: Session) -> None:
+        if not self._needs_rebuild():
+            return
+        with self._lock:
+            if self._needs_rebuild():
+                self.build(db)
+
+    @staticmethod
+    def _candidates(snapshot: _Snapshot, lat: float, lng: float, radius_m: float) -> np.ndarray:
+        dlat = radius_m / METERS_PER_DEG_LAT
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlng = min(dlat / cos_lat, 180.0)
+        min_i, min_j = _cell(lat - dlat, lng - dlng)
+        max_i, max_j = _cell(lat + dlat, lng + dlng)
+
+        cells = snapshot.cells
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(cells):
+            return np.arange(len(snapshot.rows))
+
+        parts = [
+            cells[(i, j)]
+            for i in range(min_i, max_i + 1)
+            for j in range(min_j, max_j + 1)
+            if (i, j) in cells
+        ]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def within_radius(self, lat: float, lng: float, radius_m: float) -> List[dict]:
+        """
+        Schools within `radius_m` meters of (lat, lng), nearest first.
+        Each item is the indexed row plus `jarak` in meters.
+        """
+        snapshot = self._snapshot
+        idx = self._candidates(snapshot, lat, lng, radius_m)
+        if len(idx) == 0:
+            return []
+        dist = haversine_m(lat, lng, snapshot.lats_rad[idx], snapshot.lngs_rad[idx])
+        inside = dist <= radius_m
+        idx = idx[inside]
+        dist = dist[inside]
+        order = np.argsort(dist, kind="stable")
+        rows = snapshot.rows
+        return [
+            {**rows[i], "jarak": float(d)}
+            for i, d in zip(idx[order].tolist(), dist[order].tolist())
+        ]
+
+sekolah_index = SekolahSpatialIndex()
+
+def find_sekolah_within_radius(
+    db: Session, lat: float, lng: float, radius_m: float
+) -> List[dict]:
+    sekolah_index.ensure_built(db)
+    return sekolah_index.within_radius(lat, lng, radius_m)
+
+def parse_koordinat(koordinat: Optional[dict]) -> Optional[Tuple[float, float]]:
+    """
+    Read a `{lat, lng}` JSON value (as stored in Siswa.koordinat_rumah).
+    """
+    if not isinstance(koordinat, dict):
+        return None
+    try:
+        return float(koordinat["lat"]), float(koordinat["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,92 @@
+"""
+Benchmark of the deferred-acceptance allocator on synthetic data.
+
+Generates students with several school choices each, random school-side
+priorities and capacities, runs the allocator and verifies the result is
+a stable matching.
+
+Usage (from the backend directory):
+    python benchmarks/bench_alokasi.py --students 200000 --choices 3 --groups 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add current directory to sys.path
+sys.path.append(os.path.join(os.getcwd(), "."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+import numpy as np
+from app.services.alokasi import deferred_acceptance
+
+def make_data(students: int, choices: int, groups: int, seats_ratio: float, seed: int):
+    rng = np.random.default_rng(seed)
+    # Popular schools get more applications (Zipf-like popularity).
+    popularity = 1.0 / np.arange(1, groups + 1) ** 0.8
+    popularity /= popularity.sum()
+
+    student = np.repeat(np.arange(students), choices)
+    group = np.empty(students * choices, dtype=np.int64)
+    for c in range(choices):
+        group[c::choices] = rng.choice(groups, size=students, p=popularity)
+    # Duplicate picks of the same school only make that choice redundant.
+    preference = np.tile(np.arange(choices), students)
+
+    score = rng.random(len(student))
+    order = np.lexsort((-score, group))
+    sorted_group = group[order]
+    group_start = np.searchsorted(sorted_group, np.arange(groups))
+    priority = np.empty(len(order), dtype=np.int64)
+    priority[order] = np.arange(len(order)) - group_start[sorted_group]
+
+    total_seats = int(students * seats_ratio)
+    capacity = np.maximum(1, np.round(popularity * total_seats)).astype(np.int64)
+    return student, preference, group, priority, capacity
+
+def check_stable(student, preference, group, priority, capacity, accepted) -> int:
+    """
+    Count blocking pairs: a student who prefers group g over their placement
+    while g has a free seat or holds someone with a worse priority.
+    """
+    n_students = int(student.max()) + 1
+    placed_pref = np.full(n_students, np.iinfo(np.int64).max)
+    placed_pref[student[accepted]] = preference[accepted]
+
+    filled = np.bincount(group[accepted], minlength=len(capacity))
+    worst_held = np.full(len(capacity), -1)
+    np.maximum.at(worst_held, group[accepted], priority[accepted])
+
+    wants = preference < placed_pref[student]
+    blocking = wants & ((filled[group] < capacity[group]) | (priority < worst_held[group]))
+    return int(blocking.sum())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200000)
+    parser.add_argument("--choices", type=int, default=3)
+    parser.add_argument("--groups", type=int, default=2000, help="number of (sekolah, jalur) pairs")
+    parser.add_argument("--seats-ratio", type=float, default=0.8, help="total seats / students")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data = make_data(args.students, args.choices, args.groups, args.seats_ratio, args.seed)
+    print(f"generated {len(data[0]):,} applications in {time.perf_counter() - started:.2f}s")
+
+    started = time.perf_counter()
+    accepted = deferred_acceptance(*data)
+    elapsed = time.perf_counter() - started
+
+    student, preference, group, priority, capacity = data
+    placed = np.unique(student[accepted]).size
+    print(f"allocated {placed:,}/{args.students:,} students to {int(capacity.sum()):,} seats in {elapsed:.2f}s")
+
+    per_student = np.bincount(student[accepted], minlength=args.students)
+    over_capacity = np.bincount(group[accepted], minlength=len(capacity)) > capacity
+    blocking = check_stable(*data, accepted)
+    if per_student.max() > 1 or over_capacity.any() or blocking:
+        print(f"FAIL: multi-placed={int((per_student > 1).sum())} over-capacity={int(over_capacity.sum())} blocking-pairs={blocking}")
+        sys.exit(1)
+    print("OK: stable matching")
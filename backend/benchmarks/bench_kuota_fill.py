@@ -0,0 +1,124 @@
+"""
+Kuota fill-rate dashboard: one grouped query, and a cold-cache storm.
+
+Fills sekolah with two Kuota rows each and pendaftaran against them, times
+`get_kuota_fill_async` unscoped and for one dinas, then sends N concurrent
+`/api/stats/kuota` requests as one admin_dinas on an empty cache and counts
+how many times the query actually ran (should be 1 per worker).
+
+Usage (from the backend directory):
+    python benchmarks/bench_kuota_fill.py --sekolah 2000 --rows 200000 --clients 500
+
+Always uses a throwaway SQLite file.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+# Add current directory to sys.path
+sys.path.append(os.path.join(os.getcwd(), "."))
+tmp_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir.name, 'bench_kuota_fill.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+import httpx
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.api.stats import kuota_fill_cache
+from app.core.security import create_access_token
+from app.crud import kuota as crud_kuota
+from app.db.base import Base
+from app.db.session import async_engine, engine
+from app.main import app
+from app.models.jalur import Jalur
+from app.models.kuota import Kuota
+from app.models.pendaftaran import Pendaftaran
+from app.models.sekolah import Sekolah
+from app.models.tahun_ajaran import TahunAjaran
+from check_query_plans import seed
+
+BATCH = 5000
+
+def fill(db: Session, n_sekolah: int, rows: int) -> dict:
+    ids = seed(db, n_dinas=10, n_sekolah=n_sekolah, n_siswa=1)
+    sekolah_ids = [row[0] for row in db.execute(select(Sekolah.id))]
+    jalur_ids = [row[0] for row in db.execute(select(Jalur.id))]
+    tahun_ajaran_id = db.scalar(select(TahunAjaran.id))
+    for start in range(0, rows, BATCH):
+        db.execute(insert(Pendaftaran), [
+            {
+                "id": str(uuid.uuid4()),
+                "siswa_id": ids["siswa_id"],
+                "sekolah_id": sekolah_ids[i % len(sekolah_ids)],
+                "jalur_id": jalur_ids[i % len(jalur_ids)],
+                "tahun_ajaran_id": tahun_ajaran_id,
+                "no_pendaftaran": f"FILL-{i}",
+                "status": ("submitted", "verified", "diterima", "tidak_diterima")[i % 4],
+            }
+            for i in range(start, min(rows, start + BATCH))
+        ])
+        db.commit()
+    return ids
+
+async def timed_query(**scope) -> float:
+    best = float("inf")
+    for _ in range(5):
+        async with AsyncSession(async_engine) as db:
+            started = time.perf_counter()
+            await crud_kuota.get_kuota_fill_async(db, **scope)
+            best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+async def storm(user_id: str, clients: int, executed: list):
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm the user lookup, the storm is about the kuota entry expiring.
+        await client.get("/api/stats/kuota", headers=headers)
+        kuota_fill_cache.clear()
+        executed.clear()
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.get("/api/stats/kuota", headers=headers) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return responses, elapsed
+
+def run(n_sekolah: int, rows: int, clients: int):
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        started = time.perf_counter()
+        ids = fill(db, n_sekolah, rows)
+        kuota_rows = db.query(Kuota).count()
+        print(f"filled {n_sekolah:,} sekolah, {kuota_rows:,} kuota, {rows:,} pendaftaran in {time.perf_counter() - started:.1f}s")
+
+    print(f"grouped query, all sekolah: {asyncio.run(timed_query()):.1f}ms")
+    print(f"grouped query, one dinas:   {asyncio.run(timed_query(dinas_id=ids['dinas_id'])):.1f}ms")
+
+    executed = []
+    listener = lambda conn, cursor, statement, *args: executed.append(statement) if "FROM kuota" in statement else None
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    responses, elapsed = asyncio.run(storm(ids["admins"]["admin_dinas"], clients, executed))
+    event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    statuses = {r.status_code for r in responses}
+    bodies = {r.content for r in responses}
+    print(
+        f"{clients} concurrent cold requests: {len(executed)} grouped quer{'y' if len(executed) == 1 else 'ies'}, "
+        f"{elapsed * 1000:.0f}ms total, HTTP {sorted(statuses)}, {len(bodies)} distinct bodies"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sekolah", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=500)
+    args = parser.parse_args()
+    try:
+        run(args.sekolah, args.rows, args.clients)
+    finally:
+        engine.dispose()
+        tmp_dir.cleanup()
@@ -0,0 +1,95 @@
+"""
+Login storm benchmark against a running API server.
+
+Fires concurrent logins at /api/auth/login while a prober keeps calling a
+cheap non-login endpoint, then reports logins/sec, how many logins were
+shed with 503 and the latency percentiles of the prober.
+
+Usage (server started separately, e.g. `uvicorn app.main:app --workers 1`):
+    python benchmarks/bench_login.py --email siswa@test.com --password password123
+    python benchmarks/bench_login.py --concurrency 64 --duration 20 --probe-path /health
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+def _request(url: str, data: bytes = None, timeout: float = 30.0) -> int:
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run(base_url: str, email: str, password: str, concurrency: int, duration: float, probe_path: str):
+    login_url = f"{base_url}/api/auth/login"
+    body = urllib.parse.urlencode({"username": email, "password": password}).encode()
+    deadline = time.monotonic() + duration
+    counts = {}
+    counts_lock = threading.Lock()
+    login_latencies = []
+    probe_latencies = []
+
+    def login_worker():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            code = _request(login_url, data=body)
+            elapsed = time.perf_counter() - started
+            with counts_lock:
+                counts[code] = counts.get(code, 0) + 1
+                if code == 200:
+                    login_latencies.append(elapsed)
+            if code == 503:
+                time.sleep(0.05)
+
+    def probe_worker():
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            _request(f"{base_url}{probe_path}")
+            probe_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as pool:
+        pool.submit(probe_worker)
+        for _ in range(concurrency):
+            pool.submit(login_worker)
+    elapsed = time.monotonic() - started
+
+    ok = counts.get(200, 0)
+    print(f"duration={elapsed:.1f}s concurrency={concurrency}")
+    print(f"responses by status: {dict(sorted(counts.items()))}")
+    print(f"logins/sec: {ok / elapsed:.1f}")
+    if login_latencies:
+        print(f"login latency p50={percentile(login_latencies, 50) * 1000:.0f}ms p99={percentile(login_latencies, 99) * 1000:.0f}ms")
+    print(
+        f"{probe_path} latency during storm: n={len(probe_latencies)} "
+        f"p50={percentile(probe_latencies, 50) * 1000:.1f}ms "
+        f"p99={percentile(probe_latencies, 99) * 1000:.1f}ms "
+        f"max={max(probe_latencies, default=float('nan')) * 1000:.1f}ms"
+    )
+    if probe_latencies:
+        print(f"{probe_path} mean: {statistics.mean(probe_latencies) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", default="siswa@test.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--probe-path", default="/health", help="non-login endpoint to measure")
+    args = parser.parse_args()
+    run(args.base_url.rstrip("/"), args.email, args.password, args.concurrency, args.duration, args.probe_path)
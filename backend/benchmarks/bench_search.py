@@ -0,0 +1,117 @@
+"""
+Latency of the in-process name search at 1M siswa.
+
+Fills `app.services.search.SearchIndex` directly (no database) with
+synthetic Indonesian-style names, every siswa registered at one to three
+of the sekolah, then times searches unscoped, for one dinas and for one
+sekolah. Reports build time, memory and p50/p95/max per scope; the target
+is under 20 ms. NISN / NIK queries are not covered: they are range scans
+on the unique indexes (see check_query_plans.py).
+
+Usage (from the backend directory):
+    python benchmarks/bench_search.py --siswa 1000000
+"""
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import uuid
+
+# Add current directory to sys.path
+sys.path.append(os.path.join(os.getcwd(), "."))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from app.services.search import SearchIndex
+
+COMMON = [
+    "muhammad", "siti", "putri", "nur", "dewi", "ahmad", "sri", "budi", "agus", "rizky",
+    "dian", "fitri", "indah", "eka", "dwi", "tri", "wahyu", "adi", "ayu", "rahmat",
+    "nurul", "aditya", "fajar", "putra", "sari", "kurniawan", "hidayat", "saputra", "pratama", "lestari",
+]
+SYLLABLES = ["ba", "ri", "sa", "to", "ni", "ka", "lu", "me", "ra", "di", "yo", "wa", "ha", "ti", "an", "su", "nu", "ja"]
+
+def rare_words(rng: random.Random, n: int) -> list:
+    return list({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(n)})
+
+def fill(index: SearchIndex, n_siswa: int, n_sekolah: int, n_dinas: int, rng: random.Random) -> dict:
+    sekolah = [
+        {"id": str(uuid.uuid4()), "dinas_id": f"dinas-{i % n_dinas}", "npsn": f"{10000000 + i}", "name": f"SMP Negeri {i}", "jenjang": "SMP"}
+        for i in range(n_sekolah)
+    ]
+    index.set_sekolah(sekolah)
+    rare = rare_words(rng, 20000)
+    names = []
+    for _ in range(n_siswa):
+        siswa_id = str(uuid.uuid4())
+        words = [rng.choice(COMMON) for _ in range(rng.randint(1, 2))] + [rng.choice(rare)]
+        rng.shuffle(words)
+        name = " ".join(word.capitalize() for word in words)
+        index.add_siswa(siswa_id, name)
+        for s in rng.sample(sekolah, rng.randint(1, 3)):
+            index.add_pendaftaran(siswa_id, s["id"])
+        if len(names) < 2000:
+            names.append(name)
+    index.mark_loaded()
+    return {"sekolah": sekolah, "names": names, "rare": rare}
+
+def queries(data: dict, rng: random.Random, n: int) -> list:
+    result = []
+    for _ in range(n):
+        name = rng.choice(data["names"]).lower().split()
+        kind = rng.randrange(5)
+        if kind == 0:
+            result.append(" ".join(name))                      # full name
+        elif kind == 1:
+            result.append(" ".join(w[:3] for w in name))       # prefix of every word
+        elif kind == 2:
+            result.append(rng.choice(COMMON)[:2])              # short, very common
+        elif kind == 3:
+            result.append(rng.choice(data["rare"]))            # rare word
+        else:
+            result.append(f"{rng.choice(COMMON)} {rng.choice(COMMON)[:2]}")
+    return result
+
+def timed(fn, qs) -> list:
+    samples = []
+    for q in qs:
+        started = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+def run(n_siswa: int, n_sekolah: int, n_dinas: int, n_queries: int, seed: int):
+    rng = random.Random(seed)
+    index = SearchIndex()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    data = fill(index, n_siswa, n_sekolah, n_dinas, rng)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"indexed {n_siswa:,} siswa / {n_sekolah:,} sekolah in {time.perf_counter() - started:.1f}s, "
+          f"max RSS +{(rss_after - rss_before) / 1024:.0f} MB")
+
+    qs = queries(data, rng, n_queries)
+    sekolah = data["sekolah"][0]
+    scopes = [
+        ("all", {}),
+        ("dinas", {"dinas_id": sekolah["dinas_id"]}),
+        ("sekolah", {"sekolah_id": sekolah["id"]}),
+    ]
+    print(f"{'scope':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, scope in scopes:
+        samples = timed(lambda q: (index.search_siswa_ids(q, 20, **scope), index.search_sekolah(q, 20, **scope)), qs)
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(f"{name:>8} {statistics.median(samples):>8.2f} {p95:>8.2f} {max(samples):>8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--siswa", type=int, default=1000000)
+    parser.add_argument("--sekolah", type=int, default=1000)
+    parser.add_argument("--dinas", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    run(args.siswa, args.sekolah, args.dinas, args.queries, args.seed)
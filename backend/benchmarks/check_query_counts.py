@@ -0,0 +1,110 @@
+"""
+Query count budget check for the API.
+
+Calls the read endpoints as each role against a seeded database and fails
+when an endpoint runs more SQL statements than its budget. The count comes
+from the X-DB-Query-Count header of the query counting middleware, so it
+includes lazy loads during response serialization; an N+1 regression shows
+up as a count that grows with the seeded data (try `--siswa 1000`).
+
+Usage (from the backend directory):
+    python benchmarks/check_query_counts.py
+    python benchmarks/check_query_counts.py --siswa 1000
+
+Always uses a throwaway SQLite file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# Add current directory to sys.path
+sys.path.append(os.path.join(os.getcwd(), "."))
+tmp_dir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir.name, 'query_counts.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ["APP_ENV"] = "local"
+os.environ.setdefault("JWT_SECRET", "benchmark")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import engine
+from app.main import app
+from check_query_plans import seed
+
+# (role, path, max statements). Budgets include resolving the caller.
+BUDGETS = [
+    ("super_admin", "/api/sekolah/", 3),
+    ("admin_dinas", "/api/sekolah/", 3),
+    ("admin_sekolah", "/api/sekolah/", 3),
+    ("super_admin", "/api/siswa/", 3),
+    ("admin_dinas", "/api/siswa/", 3),
+    ("admin_sekolah", "/api/siswa/", 3),
+    ("siswa", "/api/siswa/", 3),
+    ("super_admin", "/api/pendaftaran/", 3),
+    ("admin_dinas", "/api/pendaftaran/", 3),
+    ("admin_sekolah", "/api/pendaftaran/", 3),
+    ("siswa", "/api/pendaftaran/", 3),
+    ("admin_dinas", "/api/pendaftaran/?fields=status", 3),
+    ("super_admin", "/api/pendaftaran/facets", 4),
+    ("admin_dinas", "/api/pendaftaran/facets?status=submitted", 4),
+    # Served from the stats counters, counted at startup.
+    ("super_admin", "/api/stats/summary", 1),
+    ("admin_dinas", "/api/stats/summary", 1),
+    ("admin_sekolah", "/api/stats/summary", 1),
+    ("super_admin", "/api/stats/timeseries?granularity=day&start=2026-01-01T00:00:00", 2),
+    ("admin_dinas", "/api/stats/timeseries?group_by=jalur", 2),
+    ("admin_sekolah", "/api/stats/timeseries?granularity=minute", 2),
+    ("super_admin", "/api/stats/kuota", 2),
+    ("admin_dinas", "/api/stats/kuota", 2),
+    ("admin_sekolah", "/api/stats/kuota", 2),
+    ("super_admin", "/api/users/", 3),
+    # The siswa index loads in the background; until then names are
+    # scanned: sekolah, the scan or the indexed hits, and the principal.
+    ("admin_dinas", "/api/search/?q=siswa", 4),
+    ("admin_sekolah", "/api/search/?q=00", 4),
+    ("super_admin", "/api/dinas/", 3),
+    # Builds the feed page, later calls (and 304s) run none.
+    (None, "/api/common/pengumuman", 1),
+    (None, "/api/common/berita", 1),
+    (None, "/api/common/berita?skip=10&limit=10", 1),
+    # Loads the reference cache, later calls (and 304s) run none.
+    (None, "/api/config/jalur", 1),
+    (None, "/api/config/tahun-ajaran", 1),
+    (None, "/api/config/tahun-ajaran/active", 1),
+]
+
+def run(n_siswa: int) -> int:
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        ids = seed(db, n_siswa=n_siswa)
+    users = {**ids["admins"], "siswa": ids["user_id"]}
+
+    failures = 0
+    with TestClient(app) as client:
+        for role, path, budget in BUDGETS:
+            headers = {"Authorization": f"Bearer {create_access_token(users[role])}"} if role else {}
+            response = client.get(path, headers=headers)
+            count = int(response.headers["X-DB-Query-Count"])
+            failed = response.status_code != 200 or count > budget
+            failures += failed
+            print(
+                f"{'FAIL' if failed else 'ok':>4}  {role or 'public':<13} {path:<24} "
+                f"{count:>3}/{budget} queries {response.headers['X-DB-Time-Ms']}ms"
+                + (f" (HTTP {response.status_code})" if response.status_code != 200 else "")
+            )
+    print(f"{len(BUDGETS) - failures}/{len(BUDGETS)} endpoints within budget")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--siswa", type=int, default=300, help="seeded siswa, two pendaftaran each")
+    args = parser.parse_args()
+    try:
+        failed = run(args.siswa)
+    finally:
+        engine.dispose()
+        tmp_dir.cleanup()
+    sys.exit(1 if failed else 0)